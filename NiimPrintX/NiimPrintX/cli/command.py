@@ -1,8 +1,14 @@
 import asyncio
 import click
+from click.core import ParameterSource
 from PIL import Image
 from NiimPrintX.nimmy.bluetooth import find_device
+from NiimPrintX.nimmy.dither import DITHER_METHODS, dither_image
+from NiimPrintX.nimmy.jobfile import encode_job, is_job_file, load_job
+from NiimPrintX.nimmy.models import PRINTER_MODELS, get_model
+from NiimPrintX.nimmy.pacing import calibrate, pacing_profiles
 from NiimPrintX.nimmy.printer import PrinterClient, InfoEnum
+from NiimPrintX.nimmy.transport import TRANSPORTS, make_transport
 from NiimPrintX.nimmy.logger_config import setup_logger, get_logger, logger_enable
 from NiimPrintX.nimmy.helper import print_info, print_error, print_success
 
@@ -11,6 +17,9 @@ from devtools import debug
 setup_logger()
 logger = get_logger()
 
+# print options that encode bakes into a job file
+JOB_FILE_SETTINGS = ("density", "quantity", "vertical_offset", "horizontal_offset", "rotate", "dither")
+
 
 @click.group(context_settings={"help_option_names": ['-h', '--help']})
 @click.option(
@@ -32,7 +41,7 @@ def niimbot_cli(ctx, verbose):
 @click.option(
     "-m",
     "--model",
-    type=click.Choice(["b1", "b18", "b21", "d11", "d110"], False),
+    type=click.Choice(sorted(PRINTER_MODELS), False),
     default="d110",
     show_default=True,
     help="Niimbot printer model",
@@ -74,76 +83,274 @@ def niimbot_cli(ctx, verbose):
     show_default=True,
     help="Image rotation (clockwise)",
 )
+@click.option(
+    "--dither",
+    type=click.Choice(DITHER_METHODS, False),
+    default=None,
+    help="Dithering for grayscale and color images (default: Pillow's Floyd-Steinberg)",
+)
+@click.option(
+    "-t",
+    "--transport",
+    type=click.Choice(TRANSPORTS, False),
+    default="ble",
+    show_default=True,
+    help="Printer connection (usb uses the serial port given by --port, sim an in-process simulated printer)",
+)
+@click.option(
+    "--port",
+    default="/dev/ttyACM0",
+    show_default=True,
+    help="Serial port of a printer connected over USB",
+)
 @click.option(
     "-i",
     "--image",
     type=click.Path(exists=True),
     required=True,
-    help="Image path",
+    help="Image path, or a job file from the encode command",
 )
-def print_command(model, density, rotate, image, quantity, vertical_offset, horizontal_offset):
+@click.pass_context
+def print_command(ctx, model, density, rotate, image, quantity, vertical_offset, horizontal_offset, dither, transport,
+                  port):
     logger.info(f"Niimbot Printing Start")
 
-    if model in ("b1", "b18", "b21"):
-        max_width_px = 400
-    if model in ("d11", "d110"):
-        max_width_px = 240
-
-    if model in ("b18", "d11", "d110") and density > 3:
-        density = 3
+    capabilities = get_model(model)
+    density = capabilities.clamp_density(density)
+    if is_job_file(image):
+        # The job file already holds the rendered label and its print settings
+        given = [param.opts[-1] for param in ctx.command.params
+                 if param.name in JOB_FILE_SETTINGS and ctx.get_parameter_source(param.name) != ParameterSource.DEFAULT]
+        if given:
+            raise click.UsageError(f"{', '.join(given)} cannot be used with a job file, pass them to encode instead")
     try:
+        if is_job_file(image):
+            asyncio.run(_print_job(model, image, transport, port))
+            return
         image = Image.open(image)
 
         if rotate != "0":
             # PIL library rotates counterclockwise, so we need to multiply by -1
             image = image.rotate(-int(rotate), expand=True)
-        assert image.width <= max_width_px, f"Image width too big for {model.upper()}"
-        asyncio.run(_print(model, density, image, quantity, vertical_offset, horizontal_offset))
+        assert image.width <= capabilities.printhead_width, f"Image width too big for {model.upper()}"
+        asyncio.run(_print(model, density, image, quantity, vertical_offset, horizontal_offset, dither, transport,
+                           port))
     except Exception as e:
         logger.info(f"{e}")
 
 
-async def _print(model, density, image, quantity, vertical_offset, horizontal_offset):
+async def _make_printer(model, transport, port=None):
+    device, link = make_transport(transport, model, port)
+    return PrinterClient(device or await find_device(model), link)
+
+
+async def _print(model, density, image, quantity, vertical_offset, horizontal_offset, dither, transport, port):
     try:
         print_info("Starting print job")
-        device = await find_device(model)
-        printer = PrinterClient(device)
+        printer = await _make_printer(model, transport, port)
         if await printer.connect():
-            print(f"Connected to {device.name}")
+            print(f"Connected to {printer.device.name}")
 
-        if model == "b1":
-            print_info("Printing with B1 model")
-            await printer.print_imageV2(image, density=density, quantity=quantity)
-        else:
-            await printer.print_image(image, density=density, quantity=quantity, vertical_offset=vertical_offset,
-                                      horizontal_offset=horizontal_offset)
+        await printer.print_labels([(image, quantity)], density=density, vertical_offset=vertical_offset,
+                                   horizontal_offset=horizontal_offset, dither=dither)
 
         print_success("Print job completed")
+        if transport == "sim":
+            pages = printer.transport.printer.pages
+            print_info(f"Simulated printer received {len(pages)} page(s): "
+                       f"{', '.join(f'{p.width}x{p.height}' for p in pages)}")
         await printer.disconnect()
     except Exception as e:
         logger.debug(f"{e}")
         await printer.disconnect()
 
 
+async def _print_job(model, path, transport, port):
+    with load_job(path) as job:
+        if job.model != model:
+            print_error(f"{path} was encoded for {job.model.upper()}, not {model.upper()}")
+            return
+        try:
+            printer = await _make_printer(model, transport, port)
+            await printer.connect()
+            print_info(f"Printing job {job}")
+            await printer.print_job(job)
+            print_success("Print job completed")
+            await printer.disconnect()
+        except Exception as e:
+            logger.debug(f"{e}")
+            await printer.disconnect()
+
+
+@niimbot_cli.command("encode")
+@click.option(
+    "-m",
+    "--model",
+    type=click.Choice(sorted(PRINTER_MODELS), False),
+    default="d110",
+    show_default=True,
+    help="Niimbot printer model",
+)
+@click.option(
+    "-d",
+    "--density",
+    type=click.IntRange(1, 5),
+    default=3,
+    show_default=True,
+    help="Print density",
+)
+@click.option(
+    "-n",
+    "--quantity",
+    default=1,
+    show_default=True,
+    help="Print quantity",
+)
+@click.option(
+    "--vo",
+    "vertical_offset",
+    default=0,
+    show_default=True,
+    help="Vertical offset in pixels",
+)
+@click.option(
+    "--ho",
+    "horizontal_offset",
+    default=0,
+    show_default=True,
+    help="Horizontal offset in pixels",
+)
+@click.option(
+    "-r",
+    "--rotate",
+    type=click.Choice(["0", "90", "180", "270"]),
+    default="0",
+    show_default=True,
+    help="Image rotation (clockwise)",
+)
+@click.option(
+    "--dither",
+    type=click.Choice(DITHER_METHODS, False),
+    default=None,
+    help="Dithering for grayscale and color images (default: Pillow's Floyd-Steinberg)",
+)
+@click.option(
+    "-i",
+    "--image",
+    type=click.Path(exists=True),
+    required=True,
+    help="Image path",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="Job file to write",
+)
+def encode_command(model, density, quantity, vertical_offset, horizontal_offset, rotate, dither, image, output):
+    capabilities = get_model(model)
+    density = capabilities.clamp_density(density)
+    try:
+        image = Image.open(image)
+        if rotate != "0":
+            image = image.rotate(-int(rotate), expand=True)
+        if dither:
+            image = dither_image(image, dither)
+        job = encode_job(image, model, density, quantity, vertical_offset, horizontal_offset, v2=capabilities.v2,
+                         printhead_width=capabilities.printhead_width)
+        assert job.width <= capabilities.printhead_width, f"Image width too big for {model.upper()}"
+        job.save(output)
+        print_success(f"Wrote {job} to {output}")
+    except Exception as e:
+        print_error(f"{e}")
+
+
+@niimbot_cli.command("calibrate")
+@click.option(
+    "-m",
+    "--model",
+    type=click.Choice(sorted(PRINTER_MODELS), False),
+    default="d110",
+    show_default=True,
+    help="Niimbot printer model",
+)
+@click.option(
+    "-t",
+    "--transport",
+    type=click.Choice(TRANSPORTS, False),
+    default="ble",
+    show_default=True,
+    help="Printer connection (usb uses the serial port given by --port, sim an in-process simulated printer)",
+)
+@click.option(
+    "--port",
+    default="/dev/ttyACM0",
+    show_default=True,
+    help="Serial port of a printer connected over USB",
+)
+@click.option(
+    "--reset",
+    is_flag=True,
+    help="Forget the model's saved profiles instead of calibrating",
+)
+def calibrate_command(model, transport, port, reset):
+    """Print test patterns to find the fastest reliable transmit pacing."""
+    if reset:
+        pacing_profiles.forget(model)
+        print_success(f"Pacing profiles for {model.upper()} removed")
+        return
+    if transport == "usb":
+        print_error("USB connections are not paced, there is nothing to calibrate")
+        return
+    asyncio.run(_calibrate(model, transport, port))
+
+
+async def _calibrate(model, transport, port):
+    try:
+        printer = await _make_printer(model, transport, port)
+        await printer.connect()
+        print_info("Calibrating, this prints a few test labels")
+        profile = await calibrate(printer)
+        print_success(f"Pacing for {printer.model.upper()} firmware {await printer.get_firmware()}: {profile}")
+        await printer.disconnect()
+    except Exception as e:
+        print_error(f"{e}")
+        await printer.disconnect()
+
+
 @niimbot_cli.command("info")
 @click.option(
     "-m",
     "--model",
-    type=click.Choice(["b1", "b18", "b21", "d11", "d110"], False),
+    type=click.Choice(sorted(PRINTER_MODELS), False),
     default="d110",
     show_default=True,
     help="Niimbot printer model",
 )
-def info_command(model):
+@click.option(
+    "-t",
+    "--transport",
+    type=click.Choice(TRANSPORTS, False),
+    default="ble",
+    show_default=True,
+    help="Printer connection (usb uses the serial port given by --port, sim an in-process simulated printer)",
+)
+@click.option(
+    "--port",
+    default="/dev/ttyACM0",
+    show_default=True,
+    help="Serial port of a printer connected over USB",
+)
+def info_command(model, transport, port):
     logger.info("Niimbot Information")
     print_info("Niimbot Information")
-    asyncio.run(_info(model))
+    asyncio.run(_info(model, transport, port))
 
 
-async def _info(model):
+async def _info(model, transport, port):
     try:
-        device = await find_device(model)
-        printer = PrinterClient(device)
+        printer = await _make_printer(model, transport, port)
         await printer.connect()
         device_serial = await printer.get_info(InfoEnum.DEVICESERIAL)
         software_version = await printer.get_info(InfoEnum.SOFTVERSION)
@@ -1,18 +1,78 @@
 import asyncio
+import json
+from pathlib import Path
+
+import appdirs
 from bleak import BleakClient, BleakScanner
 
 from .exception import BLEException
 from .logger_config import get_logger
+from .transport import Transport
 
 logger = get_logger()
 
 
-async def find_device(device_name_prefix=None):
-    devices = await BleakScanner.discover()
-    for device in devices:
-        if device.name and device.name.lower().startswith(device_name_prefix.lower()):
-            return device
-    raise BLEException(f"Failed to find device {device_name_prefix}")
+class CachedDevice:
+    """A printer remembered from an earlier connection, usable wherever a scanned device is."""
+
+    def __init__(self, name, address, char_uuid=None):
+        self.name = name
+        self.address = address
+        self.char_uuid = char_uuid
+
+    def __repr__(self):
+        return f"<CachedDevice name={self.name} address={self.address}>"
+
+
+class DeviceCache:
+    """Address and characteristic of previously connected printers, most recent first."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(appdirs.user_cache_dir("NiimPrintX")) / "devices.json")
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, entries):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(entries, indent=2))
+        except OSError as e:
+            logger.warning(f"Cannot write device cache {self.path}: {e}")
+
+    def get(self, device_name_prefix):
+        for entry in self._load():
+            if entry["name"].lower().startswith(device_name_prefix.lower()):
+                return CachedDevice(entry["name"], entry["address"], entry.get("char_uuid"))
+        return None
+
+    def remember(self, name, address, char_uuid):
+        entries = [e for e in self._load() if e["address"] != address]
+        entries.insert(0, {"name": name, "address": address, "char_uuid": char_uuid})
+        self._save(entries)
+
+    def forget(self, address):
+        self._save([e for e in self._load() if e["address"] != address])
+
+
+device_cache = DeviceCache()
+
+
+async def find_device(device_name_prefix=None, timeout=10.0, use_cache=True):
+    if use_cache and (device := device_cache.get(device_name_prefix)):
+        logger.debug(f"Using cached device {device}")
+        return device
+
+    prefix = device_name_prefix.lower()
+    # Returns as soon as a matching printer advertises instead of waiting out a full scan
+    device = await BleakScanner.find_device_by_filter(
+        lambda d, adv: bool(d.name) and d.name.lower().startswith(prefix), timeout=timeout)
+    if device is None:
+        raise BLEException(f"Failed to find device {device_name_prefix}")
+    return device
 
 
 async def scan_devices(device_name=None):
@@ -28,10 +88,17 @@ async def scan_devices(device_name=None):
     return None
 
 
-class BLETransport:
+# ATT header bytes taken from every write
+ATT_OVERHEAD = 3
+# ATT MTU every link starts with before a larger one is negotiated
+DEFAULT_MTU = 23
+
+
+class BLETransport(Transport):
     def __init__(self, address=None):
         self.address = address
         self.client = None
+        self._mtu = DEFAULT_MTU
 
     async def __aenter__(self):
         # Automatically connect if address is provided during initialization
@@ -49,23 +116,73 @@ class BLETransport:
             await self.client.disconnect()
             logger.info("Disconnected.")
 
+    @property
+    def is_connected(self):
+        return bool(self.client and self.client.is_connected)
+
     async def connect(self, address):
-        if self.client is None:
+        if self.client is None or self.client.address != address:
             self.client = BleakClient(address)
         if not self.client.is_connected:
-            return await self.client.connect()
+            if not await self.client.connect():
+                return False
+            await self._read_mtu()
+            return True
         return False
 
+    async def _read_mtu(self):
+        # BlueZ reports the default MTU until it is acquired through a characteristic
+        acquire = getattr(getattr(self.client, "_backend", None), "_acquire_mtu", None)
+        try:
+            if acquire is not None:
+                await acquire()
+            self._mtu = self.client.mtu_size
+        except Exception as e:
+            logger.warning(f"Cannot read the negotiated MTU, assuming {DEFAULT_MTU}: {e}")
+            self._mtu = DEFAULT_MTU
+        logger.debug(f"ATT MTU is {self._mtu}")
+
     async def disconnect(self):
         if self.client and self.client.is_connected:
             await self.client.disconnect()
 
+    async def find_characteristic(self):
+        services = {}
+        for service in self.client.services:
+            s = []
+            for char in service.characteristics:
+                s.append({
+                    "id": char.uuid,
+                    "handle": char.handle,
+                    "properties": char.properties
+                })
+
+            services[service.uuid] = s
+
+        char_uuid = None
+        for service_id, characteristics in services.items():
+            if len(characteristics) == 1:  # Check if there's exactly one characteristic
+                props = characteristics[0]['properties']
+                if 'read' in props and 'write-without-response' in props and 'notify' in props:
+                    char_uuid = characteristics[0]['id']  # Return the service ID that meets the criteria
+        return char_uuid
+
     async def write(self, data, char_uuid, response=None):
         if self.client and self.client.is_connected:
             await self.client.write_gatt_char(char_uuid, data, response=response)
         else:
             raise BLEException("BLE client is not connected.")
 
+    @property
+    def mtu(self):
+        if self.client and self.client.is_connected:
+            return self._mtu
+        return DEFAULT_MTU
+
+    @property
+    def max_write_size(self):
+        return self.mtu - ATT_OVERHEAD
+
     async def start_notification(self, char_uuid, handler):
         if self.client and self.client.is_connected:
             await self.client.start_notify(char_uuid, handler)
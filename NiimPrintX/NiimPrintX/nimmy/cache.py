@@ -0,0 +1,57 @@
+import hashlib
+from collections import OrderedDict
+
+
+class FrameCache:
+    """LRU cache of framed row packets keyed by the packed 1-bit image.
+
+    Entries are PacketFrames, evicted least recently used first once their
+    total size passes ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(data, *params):
+        """Key for packed image ``data`` and whatever else shapes its packets."""
+        return (hashlib.blake2b(data, digest_size=16).digest(),) + params
+
+    def get(self, key):
+        frames = self._entries.get(key)
+        if frames is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return frames
+
+    def put(self, key, frames):
+        if frames.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._entries[key] = frames
+        self.nbytes += frames.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (f"<FrameCache entries={len(self)} bytes={self.nbytes}/{self.max_bytes} "
+                f"hits={self.hits} misses={self.misses}>")
+
+
+frame_cache = FrameCache()
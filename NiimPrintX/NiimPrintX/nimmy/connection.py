@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import enum
+import random
+import time
+
+from .bluetooth import find_device
+from .exception import PrinterException, TransportException
+from .logger_config import get_logger
+from .printer import PrinterClient, poll_schedule
+
+logger = get_logger()
+
+
+class ConnectionState(enum.Enum):
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    CLOSED = "closed"
+
+
+def backoff_delays(first=0.5, maximum=30.0, jitter=0.5):
+    """Exponential delays between reconnect attempts, each shortened by up to
+    ``jitter`` of itself at random so printers sharing a host do not retry in step."""
+    for delay in poll_schedule(first, 2, maximum):
+        yield delay * (1 - jitter * random.random())
+
+
+class ConnectionManager:
+    """Keeps one PrinterClient connected for as long as the manager runs.
+
+    The printer is found by model name, through the device cache first,
+    and reconnected by its address with jittered exponential backoff
+    whenever the link drops. While connected and otherwise idle it sends a
+    heartbeat every ``keepalive`` seconds, so the printer's automatic
+    shutdown never ends the connection. Use the printer through
+    ``async with manager.session() as printer:``, which waits for the
+    connection and holds off keepalives while the job runs.
+    """
+
+    def __init__(self, model, device=None, transport=None, keepalive=60.0, check_interval=1.0,
+                 first_delay=0.5, max_delay=30.0):
+        self.model = model
+        self.device = device
+        self.transport = transport
+        self.keepalive = keepalive
+        # How often the link is looked at between keepalives
+        self.check_interval = check_interval
+        self.first_delay = first_delay
+        self.max_delay = max_delay
+        self.printer = None
+        # Times an established link was lost
+        self.disconnects = 0
+        self._state = ConnectionState.DISCONNECTED
+        self._connections = 0
+        self._changed = asyncio.Condition()
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def state(self):
+        return self._state
+
+    async def _set_state(self, state):
+        if state == self._state:
+            return
+        logger.info(f"Printer {self.model} {state.value}")
+        async with self._changed:
+            self._state = state
+            if state == ConnectionState.CONNECTED:
+                self._connections += 1
+            self._changed.notify_all()
+
+    async def wait_for(self, state, timeout=None):
+        """Wait until the connection is in ``state``; False if ``timeout`` passes first."""
+        async def reached():
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._state in (state, ConnectionState.CLOSED))
+            return self._state == state
+
+        try:
+            return await asyncio.wait_for(reached(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    async def connected(self, timeout=None):
+        """The connected PrinterClient, once there is one."""
+        self.start()
+
+        async def link():
+            async with self._changed:
+                while True:
+                    await self._changed.wait_for(
+                        lambda: self._state in (ConnectionState.CONNECTED, ConnectionState.CLOSED))
+                    if self._state == ConnectionState.CLOSED or self.printer.transport.is_connected:
+                        return self._state == ConnectionState.CONNECTED
+                    # The link dropped since it was last looked at, have it noticed now
+                    # and wait for the next connection
+                    self._wake.set()
+                    connections = self._connections
+                    await self._changed.wait_for(
+                        lambda: self._connections != connections or self._state == ConnectionState.CLOSED)
+
+        try:
+            if await asyncio.wait_for(link(), timeout):
+                return self.printer
+        except asyncio.TimeoutError:
+            pass
+        raise TransportException(f"Printer {self.model} is {self._state.value}")
+
+    def start(self):
+        if self._state == ConnectionState.CLOSED:
+            raise PrinterException("Connection manager is closed")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.printer is not None and self.printer.transport.is_connected:
+            await self.printer.disconnect()
+        await self._set_state(ConnectionState.CLOSED)
+
+    @contextlib.asynccontextmanager
+    async def session(self, timeout=None):
+        printer = await self.connected(timeout)
+        async with self._lock:
+            yield printer
+
+    async def _connect(self):
+        if self.printer is None:
+            device = self.device or await find_device(self.model)
+            self.printer = PrinterClient(device, self.transport)
+        if self.printer.transport.is_connected:
+            # A command sent during a session reconnected on its own
+            return
+        if not await self.printer.connect():
+            raise TransportException(f"Cannot connect to {self.printer.device.name}")
+
+    async def _run(self):
+        while True:
+            await self._set_state(ConnectionState.CONNECTING)
+            for delay in backoff_delays(self.first_delay, self.max_delay):
+                try:
+                    async with self._lock:
+                        await self._connect()
+                    break
+                except Exception as e:
+                    logger.warning(f"Connecting to {self.model} failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+            await self._set_state(ConnectionState.CONNECTED)
+            await self._keep_alive()
+            self.disconnects += 1
+            await self._set_state(ConnectionState.DISCONNECTED)
+
+    async def _keep_alive(self):
+        """Return once the link is lost, having failed whatever still waited on it."""
+        printer = self.printer
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.check_interval)
+            self._wake.clear()
+            if not printer.transport.is_connected:
+                break
+            idle = time.monotonic() - (printer.last_seen or 0)
+            if idle < self.keepalive or self._lock.locked():
+                continue
+            try:
+                async with self._lock:
+                    await printer.heartbeat()
+            except (PrinterException, TransportException) as e:
+                logger.warning(f"Keepalive to {printer.device.name} failed: {e}")
+                break
+        await printer.disconnect()
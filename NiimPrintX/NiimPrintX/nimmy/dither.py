@@ -0,0 +1,154 @@
+import hashlib
+from collections import OrderedDict
+
+from PIL import Image, ImageChops
+
+try:
+    import numpy
+except ImportError:
+    # Optional, install the numpy extra for fast Atkinson dithering of large images
+    numpy = None
+
+DITHER_METHODS = ("threshold", "bayer", "floyd-steinberg", "atkinson")
+
+# Dithered images of recently printed or previewed sources
+CACHE_SIZE = 16
+_cache = OrderedDict()
+
+
+def _bayer_matrix(n):
+    if n == 1:
+        return [[0]]
+    smaller = _bayer_matrix(n // 2)
+    return [[4 * smaller[y % (n // 2)][x % (n // 2)] + (0, 2, 3, 1)[(y >= n // 2) * 2 + (x >= n // 2)]
+             for x in range(n)] for y in range(n)]
+
+
+_BAYER_SIZE = 8
+# Thresholds spread evenly over 0..255, one per cell
+_BAYER_ROWS = [bytes(int((v + 0.5) * 256 / _BAYER_SIZE ** 2) for v in row)
+               for row in _bayer_matrix(_BAYER_SIZE)]
+
+
+def _threshold(gray, threshold):
+    return gray.point(lambda v: 255 if v >= threshold else 0, "1")
+
+
+def _bayer(gray, threshold):
+    width, height = gray.size
+    repeat = width // _BAYER_SIZE + 1
+    rows = [(row * repeat)[:width] for row in _BAYER_ROWS]
+    thresholds = Image.frombytes("L", gray.size, b"".join(rows[y % _BAYER_SIZE] for y in range(height)))
+    # Positive only where the pixel is brighter than its cell's threshold
+    return ImageChops.subtract(gray, thresholds).point(lambda v: 255 if v else 0, "1")
+
+
+def _floyd_steinberg(gray, threshold):
+    return gray.convert("1", dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def _atkinson(gray, threshold):
+    if numpy is not None:
+        return _atkinson_wavefront(gray, threshold)
+    width, height = gray.size
+    # One column of margin on the left and two on the right and bottom keep
+    # the diffusion free of bounds checks
+    stride = width + 3
+    pixels = [0] * (stride * (height + 2))
+    src = gray.tobytes()
+    for y in range(height):
+        start = y * stride + 1
+        pixels[start:start + width] = src[y * width:(y + 1) * width]
+
+    out = bytearray(width * height)
+    for y in range(height):
+        row = y * stride + 1
+        below = row + stride
+        below2 = below + stride
+        for x in range(width):
+            i = row + x
+            old = pixels[i]
+            if old >= threshold:
+                out[y * width + x] = 255
+                error = (old - 255) >> 3
+            else:
+                error = old >> 3
+            if error:
+                pixels[i + 1] += error
+                pixels[i + 2] += error
+                j = below + x
+                pixels[j - 1] += error
+                pixels[j] += error
+                pixels[j + 1] += error
+                pixels[below2 + x] += error
+    return Image.frombytes("L", gray.size, bytes(out)).convert("1", dither=Image.Dither.NONE)
+
+
+def _atkinson_wavefront(gray, threshold):
+    """Atkinson diffusion with NumPy, identical to the loop in ``_atkinson``.
+
+    Pixel (x, y) only takes error from pixels with a smaller x + 2y, so all
+    pixels on one such diagonal are final at once. In the padded row-major
+    buffer a diagonal is an evenly strided slice, as are the six pixels
+    its error goes to, so each diagonal costs a few array operations
+    instead of a Python step per pixel.
+    """
+    width, height = gray.size
+    stride = width + 3
+    pixels = numpy.zeros((height + 2, stride), numpy.int32)
+    pixels[:height, 1:width + 1] = numpy.frombuffer(gray.tobytes(), numpy.uint8).reshape(height, width)
+    flat = pixels.reshape(-1)
+    white = numpy.zeros(flat.size, bool)
+    step = stride - 2
+    targets = (1, 2, stride - 1, stride, stride + 1, 2 * stride)
+    for t in range(width + 2 * (height - 1)):
+        first = max(0, (t - width + 2) // 2)
+        last = min(height - 1, t // 2)
+        start = first * step + t + 1
+        diagonal = slice(start, start + (last - first) * step + 1, step)
+        old = flat[diagonal]
+        on = old >= threshold
+        white[diagonal] = on
+        error = (old - 255 * on) >> 3
+        for offset in targets:
+            flat[diagonal.start + offset:diagonal.stop + offset:step] += error
+    out = white.reshape(height + 2, stride)[:height, 1:width + 1]
+    return Image.frombytes("1", gray.size, numpy.packbits(out, axis=1).tobytes())
+
+
+_DITHERERS = {
+    "threshold": _threshold,
+    "bayer": _bayer,
+    "floyd-steinberg": _floyd_steinberg,
+    "atkinson": _atkinson,
+}
+
+
+def dither_image(image: Image, method="floyd-steinberg", threshold=128):
+    """Return a mode "1" image of ``image`` where white pixels are set.
+
+    ``method`` is one of DITHER_METHODS; ``threshold`` applies to the
+    threshold and Atkinson methods. Results are cached by image content, so
+    the returned image may be shared and must not be modified.
+    """
+    try:
+        ditherer = _DITHERERS[method]
+    except KeyError:
+        raise ValueError(f"Unknown dither method {method!r}, expected one of {', '.join(DITHER_METHODS)}")
+
+    digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+    palette = image.getpalette()
+    if palette is not None:
+        # Palette images with the same indices can still have other colours
+        digest.update(bytes(palette))
+    key = (digest.digest(), image.mode, image.size, method, threshold)
+    result = _cache.get(key)
+    if result is not None:
+        _cache.move_to_end(key)
+        return result
+
+    result = ditherer(image.convert("L"), threshold)
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
@@ -1,5 +1,14 @@
-class BLEException(Exception):
+class TransportException(Exception):
+    pass
+
+class BLEException(TransportException):
     pass
 
 class PrinterException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class PrinterTimeoutException(PrinterException):
+    pass
+
+class PrinterNotReadyException(PrinterException):
+    pass
@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+
+from .exception import PrinterException, PrinterNotReadyException, TransportException
+from .logger_config import get_logger
+
+logger = get_logger()
+
+
+class PrinterHealth:
+    """What the last heartbeat and RFID read said about the printer.
+
+    ``problems`` lists what keeps it from printing; firmware that leaves a
+    heartbeat field out is assumed fine on that count.
+    """
+
+    __slots__ = ("heartbeat", "rfid", "error", "checked_at")
+
+    def __init__(self, heartbeat=None, rfid=None, error=None, checked_at=None):
+        self.heartbeat = heartbeat
+        self.rfid = rfid
+        self.error = error
+        self.checked_at = checked_at
+
+    @property
+    def labels_left(self):
+        if self.rfid is None or not self.rfid.total_len:
+            return None
+        return max(self.rfid.total_len - self.rfid.used_len, 0)
+
+    def problems(self, min_power_level=1):
+        if self.error is not None:
+            return (f"no response: {self.error}",)
+        if self.heartbeat is None:
+            return ("not checked yet",)
+        problems = []
+        heartbeat = self.heartbeat
+        if heartbeat.closing_state not in (None, 0):
+            problems.append("lid open")
+        if heartbeat.paper_state not in (None, 0):
+            problems.append("no labels loaded")
+        if heartbeat.power_level is not None and heartbeat.power_level < min_power_level:
+            problems.append("battery empty")
+        if self.labels_left == 0:
+            problems.append("label roll used up")
+        return tuple(problems)
+
+    def __repr__(self):
+        return (f"<PrinterHealth problems={list(self.problems())} heartbeat={self.heartbeat} "
+                f"labels_left={self.labels_left}>")
+
+
+class HealthMonitor:
+    """Polls a PrinterClient's heartbeat in the background and gates print jobs on it.
+
+    Listeners added with ``add_listener`` are called with the new
+    PrinterHealth whenever the list of problems changes. Print inside
+    ``async with monitor.job():``, which raises PrinterNotReadyException
+    instead of starting a job on a printer that cannot finish it, and keeps
+    the monitor from polling while rows are sent.
+    """
+
+    def __init__(self, printer, interval=5.0, rfid_interval=60.0, max_age=1.0, min_power_level=1):
+        self.printer = printer
+        self.interval = interval
+        self.rfid_interval = rfid_interval
+        # A job checks again first if the last check is older than this
+        self.max_age = max_age
+        self.min_power_level = min_power_level
+        self.health = PrinterHealth()
+        self._rfid = None
+        self._rfid_at = None
+        self._listeners = []
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._task = None
+
+    @property
+    def problems(self):
+        return self.health.problems(self.min_power_level)
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _poll(self):
+        while True:
+            async with self._lock:
+                await self._check()
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        """Ask the printer now and return the updated PrinterHealth."""
+        async with self._lock:
+            return await self._check()
+
+    async def _check(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self.printer.transport.is_connected:
+            # Leave reconnecting to whoever owns the connection
+            self._publish(PrinterHealth(self.health.heartbeat, self._rfid,
+                                        error=TransportException("not connected"), checked_at=now))
+            return self.health
+        try:
+            heartbeat = await self.printer.heartbeat()
+        except (PrinterException, TransportException) as e:
+            health = PrinterHealth(self.health.heartbeat, self._rfid, error=e, checked_at=now)
+        else:
+            if self._rfid_at is None or now - self._rfid_at >= self.rfid_interval:
+                await self._read_rfid(now)
+            health = PrinterHealth(heartbeat, self._rfid, checked_at=now)
+        self._publish(health)
+        return health
+
+    async def _read_rfid(self, now):
+        # Not every printer or roll has a tag; without one the labels left are unknown
+        self._rfid_at = now
+        try:
+            self._rfid = await self.printer.get_rfid()
+        except (PrinterException, TransportException) as e:
+            logger.debug(f"Cannot read the label roll's RFID: {e}")
+            self._rfid = None
+
+    def _publish(self, health):
+        before = self.problems if self.health.checked_at is not None else None
+        self.health = health
+        problems = self.problems
+        if problems:
+            self._ready.clear()
+        else:
+            self._ready.set()
+        if problems == before:
+            return
+        if problems:
+            logger.warning(f"Printer not ready: {', '.join(problems)}")
+        else:
+            logger.info(f"Printer ready, {self.health.labels_left} labels left")
+        for listener in list(self._listeners):
+            try:
+                listener(health)
+            except Exception:
+                logger.exception("Health listener failed")
+
+    async def wait_ready(self, timeout=None):
+        """Wait until a check finds the printer ready; False if ``timeout`` passes first."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def preflight(self):
+        """Check the printer unless the last check is recent, and raise
+        PrinterNotReadyException if it cannot print."""
+        async with self._lock:
+            await self._preflight()
+
+    async def _preflight(self):
+        checked_at = self.health.checked_at
+        if checked_at is None or asyncio.get_running_loop().time() - checked_at > self.max_age or not self.ready:
+            await self._check()
+        if self.problems:
+            raise PrinterNotReadyException(", ".join(self.problems))
+
+    @contextlib.asynccontextmanager
+    async def job(self):
+        async with self._lock:
+            await self._preflight()
+            try:
+                yield self.health
+            finally:
+                # Labels were used up, read the remaining length again on the next check
+                self._rfid_at = None
@@ -0,0 +1,101 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from .packet import PacketFrames, frame_packets
+from .raster import encode_rows, pack_image
+
+JOB_MAGIC = b"NIMJ"
+JOB_VERSION = 1
+# magic, version, flags, model, width, height, density, quantity, packet count
+_JOB_HEADER = struct.Struct("<4sBB16sHHBxHI")
+JOB_V2 = 0x01
+
+
+class PrintJob:
+    """One label encoded down to its framed packet stream.
+
+    Jobs read with ``load_job`` keep the packets in a memory map; close the
+    job, or use it as a context manager, once it has been printed.
+    """
+
+    def __init__(self, model, width, height, density, quantity, frames, v2=False):
+        self.model = model
+        self.width = width
+        self.height = height
+        self.density = density
+        self.quantity = quantity
+        self.frames = frames
+        self.v2 = v2
+        self._mmap = None
+
+    def save(self, path):
+        header = _JOB_HEADER.pack(JOB_MAGIC, JOB_VERSION, JOB_V2 if self.v2 else 0, self.model.encode(),
+                                  self.width, self.height, self.density, self.quantity, len(self.frames))
+        offsets = array("I", self.frames.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(offsets.tobytes())
+            f.write(self.frames.buffer)
+
+    def close(self):
+        if self._mmap is not None:
+            frames, self.frames = self.frames, None
+            mapped, self._mmap = self._mmap, None
+            try:
+                frames.buffer.release()
+                mapped.close()
+            except BufferError:
+                # Packet views are still referenced, as by the traceback of a
+                # failed print; the map is unmapped once they are collected
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return (f"<PrintJob model={self.model} {self.width}x{self.height} density={self.density} "
+                f"quantity={self.quantity} packets={len(self.frames)}>")
+
+
+def encode_job(image, model, density=3, quantity=1, vertical_offset=0, horizontal_offset=0, v2=False,
+               compress=True, printhead_width=None):
+    data, width, height, stride = pack_image(image, vertical_offset, horizontal_offset)
+    row_offset = max(vertical_offset, 0)
+    frames = frame_packets(encode_rows(data, height, stride, compress, row_offset=row_offset,
+                                       printhead_width=printhead_width))
+    return PrintJob(model, width, row_offset + height, density, quantity, frames, v2)
+
+
+def is_job_file(path):
+    with open(path, "rb") as f:
+        return f.read(len(JOB_MAGIC)) == JOB_MAGIC
+
+
+def load_job(path):
+    """Map a job file written by ``PrintJob.save``; its packets are never copied."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, flags, model, width, height, density, quantity, count = _JOB_HEADER.unpack_from(mapped)
+        if magic != JOB_MAGIC or version != JOB_VERSION:
+            raise ValueError(f"{path} is not a version {JOB_VERSION} print job")
+        start = _JOB_HEADER.size + 4 * (count + 1)
+        offsets = array("I", mapped[_JOB_HEADER.size:start])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        if len(offsets) != count + 1 or start + offsets[-1] > len(mapped):
+            raise ValueError(f"{path} is truncated")
+    except (ValueError, struct.error):
+        mapped.close()
+        raise
+    frames = PacketFrames(memoryview(mapped)[start:start + offsets[-1]], offsets)
+    job = PrintJob(model.rstrip(b"\0").decode(), width, height, density, quantity, frames, bool(flags & JOB_V2))
+    job._mmap = mapped
+    return job
@@ -0,0 +1,46 @@
+from collections import deque
+
+
+class LatencyTracker:
+    """Recent round-trip times per request code and the deadlines derived from them.
+
+    Once a command has ``minimum_samples`` round trips its deadline is its
+    p99 times ``factor``, no shorter than ``floor`` and no longer than
+    ``default``; before that it is ``default``.
+    """
+
+    def __init__(self, samples=64, minimum_samples=5, factor=3.0, floor=0.25, default=10.0):
+        self.samples = samples
+        self.minimum_samples = minimum_samples
+        self.factor = factor
+        self.floor = floor
+        self.default = default
+        self._rtts = {}
+
+    def record(self, code, rtt):
+        rtts = self._rtts.get(code)
+        if rtts is None:
+            rtts = self._rtts[code] = deque(maxlen=self.samples)
+        rtts.append(rtt)
+
+    def percentile(self, code, q):
+        rtts = self._rtts.get(code)
+        if not rtts:
+            return None
+        ordered = sorted(rtts)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self, code):
+        rtts = self._rtts.get(code)
+        if rtts is None or len(rtts) < self.minimum_samples:
+            return self.default
+        return min(self.default, max(self.floor, self.percentile(code, 0.99) * self.factor))
+
+    def clear(self):
+        self._rtts.clear()
+
+    def __repr__(self):
+        stats = " ".join(f"0x{code:02X}:p50={self.percentile(code, 0.5) * 1000:.0f}ms"
+                         f"/p99={self.percentile(code, 0.99) * 1000:.0f}ms"
+                         for code in self._rtts)
+        return f"<LatencyTracker {stats}>"
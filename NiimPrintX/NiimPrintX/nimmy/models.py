@@ -0,0 +1,88 @@
+from .raster import BITMAP_ROW, EMPTY_ROW, INDEXED_ROW
+
+ALL_ROW_PACKETS = frozenset((BITMAP_ROW, EMPTY_ROW, INDEXED_ROW))
+
+# PrinterClient pacing before any calibration, see pacing.PACING_KEYS
+DEFAULT_PACING = {"stream_window": 16, "window_delay": 0.0, "row_delay": 0.01}
+
+
+class PrinterModel:
+    """What one NIIMBOT model can do.
+
+    ``printhead_width`` is the widest row in dots, ``density`` the
+    ``(lowest, highest, default)`` print density, and ``v2`` whether it takes
+    the V2 print protocol that sends the copy count with START_PRINT.
+    ``row_packets`` are the row packet types its firmware accepts,
+    ``coalesce`` whether it takes several row packets in one write and
+    ``max_mtu`` caps the size of coalesced writes. ``label_sizes`` maps the
+    names of the rolls offered in the GUI to their size in mm.
+    """
+
+    __slots__ = ("name", "printhead_width", "dpi", "density", "v2", "row_packets", "pacing", "coalesce",
+                 "max_mtu", "label_sizes")
+
+    def __init__(self, name, printhead_width, dpi=203, density=(1, 3, 3), v2=False, row_packets=ALL_ROW_PACKETS,
+                 pacing=DEFAULT_PACING, coalesce=True, max_mtu=None, label_sizes=None):
+        self.name = name
+        self.printhead_width = printhead_width
+        self.dpi = dpi
+        self.density = density
+        self.v2 = v2
+        self.row_packets = row_packets
+        self.pacing = pacing
+        self.coalesce = coalesce
+        self.max_mtu = max_mtu
+        self.label_sizes = label_sizes or {}
+
+    @property
+    def compressed_rows(self):
+        """Whether rows may be sent as empty-row and indexed-pixel packets."""
+        return EMPTY_ROW in self.row_packets and INDEXED_ROW in self.row_packets
+
+    def clamp_density(self, density=None):
+        lowest, highest, default = self.density
+        if density is None:
+            return default
+        return min(max(density, lowest), highest)
+
+    def __repr__(self):
+        return (f"<PrinterModel {self.name} {self.printhead_width} dots @ {self.dpi} dpi "
+                f"density={self.density[0]}-{self.density[1]} {'V2' if self.v2 else 'V1'}>")
+
+
+_D_SERIES_SIZES = {
+    "30mm x 14mm": (30, 14),
+    "40mm x 12mm": (40, 12),
+    "50mm x 14mm": (50, 14),
+    "75mm x 12mm": (75, 12),
+    "109mm x 12.5mm": (109, 12.5),
+}
+
+PRINTER_MODELS = {
+    model.name: model for model in (
+        PrinterModel("b1", 384, density=(1, 5, 3), v2=True),
+        PrinterModel("b18", 384, label_sizes={
+            "40mm x 14mm": (40, 14),
+            "50mm x 14mm": (50, 14),
+            "120mm x 14mm": (120, 14),
+        }),
+        PrinterModel("b21", 384, density=(1, 5, 3)),
+        PrinterModel("d11", 240, label_sizes=_D_SERIES_SIZES),
+        PrinterModel("d101", 240, label_sizes=_D_SERIES_SIZES),
+        PrinterModel("d110", 240, label_sizes={
+            "30mm x 15mm": (30, 15),
+            "40mm x 12mm": (40, 12),
+            "50mm x 14mm": (50, 14),
+            "75mm x 12mm": (75, 12),
+            "109mm x 12.5mm": (109, 12.5),
+        }),
+    )
+}
+
+# Assumed for printers advertising a name not listed above
+GENERIC_MODEL = PrinterModel("generic", 384, density=(1, 5, 3))
+
+
+def get_model(name):
+    """Capabilities of the model ``name``, case-insensitive, or GENERIC_MODEL."""
+    return PRINTER_MODELS.get(name.lower(), GENERIC_MODEL)
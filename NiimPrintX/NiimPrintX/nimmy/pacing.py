@@ -0,0 +1,149 @@
+import json
+from pathlib import Path
+
+import appdirs
+
+from .exception import PrinterException, TransportException
+from .logger_config import get_logger
+
+logger = get_logger()
+
+# PrinterClient attributes a pacing profile sets
+PACING_KEYS = ("stream_window", "window_delay", "row_delay")
+
+CALIBRATION_WINDOWS = (1, 2, 4, 8, 16, 32, 64)
+CALIBRATION_DELAYS = (0.0, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+
+
+class PacingProfiles:
+    """Calibrated transmit pacing per printer model and firmware version."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(appdirs.user_config_dir("NiimPrintX")) / "pacing.json")
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def has_model(self, model):
+        return model in self._load()
+
+    def get(self, model, firmware):
+        return self._load().get(model, {}).get(str(firmware))
+
+    def _save(self, profiles):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(profiles, indent=2))
+        except OSError as e:
+            logger.warning(f"Cannot write pacing profiles {self.path}: {e}")
+
+    def save(self, model, firmware, profile):
+        profiles = self._load()
+        profiles.setdefault(model, {})[str(firmware)] = profile
+        self._save(profiles)
+
+    def forget(self, model):
+        profiles = self._load()
+        if profiles.pop(model, None) is not None:
+            self._save(profiles)
+
+
+pacing_profiles = PacingProfiles()
+
+
+def test_pattern(width, height=240):
+    """Packed rows that barely compress: a different diagonal hatch on every row."""
+    stride = (width + 7) // 8
+    rows = []
+    for y in range(height):
+        bits = 0
+        for x in range(y % 7, width, 7 + y % 5):
+            bits |= 1 << (stride * 8 - 1 - x)
+        rows.append(bits.to_bytes(stride, "big"))
+    return b"".join(rows), width, height
+
+
+async def _trial(printer, pattern, v2, profile):
+    printer.apply_pacing(profile)
+    stalls = printer.stalls
+    data, width, height = pattern
+    try:
+        if v2:
+            done = await printer.print_bitmapV2(data, width, height)
+        else:
+            done = await printer.print_bitmap(data, width, height)
+    except (PrinterException, TransportException) as e:
+        logger.info(f"Pacing {profile} failed: {e}")
+        # Close the job the failed probe left open before the next one starts
+        try:
+            await printer.end_print()
+        except (PrinterException, TransportException) as e:
+            logger.warning(f"Cannot end the failed test print: {e}")
+        return False
+    ok = bool(done) and printer.stalls == stalls
+    logger.info(f"Pacing {profile} {'passed' if ok else 'failed'}")
+    return ok
+
+
+async def _search(candidates, passes):
+    """Index of the first candidate for which ``passes`` holds, assuming it keeps
+    holding from there on, or None."""
+    low, high = 0, len(candidates)
+    while low < high:
+        middle = (low + high) // 2
+        if await passes(candidates[middle]):
+            high = middle
+        else:
+            low = middle + 1
+    return low if low < len(candidates) else None
+
+
+async def calibrate(printer, width=None, v2=None, windows=CALIBRATION_WINDOWS, delays=CALIBRATION_DELAYS):
+    """Print test patterns on a connected printer to find the fastest safe pacing.
+
+    Looks for the largest streaming window that prints without errors or
+    stalls, then, if no window is safe unpaced, the smallest pause after each
+    window, and finally the smallest pause between acknowledged row writes.
+    Each probe prints one label, as wide as the printhead and with the
+    protocol of the printer's model unless ``width`` and ``v2`` say otherwise.
+    Returns the profile, also saved for the printer's model and firmware.
+    """
+    if width is None:
+        width = printer.capabilities.printhead_width
+    if v2 is None:
+        v2 = printer.capabilities.v2
+    pattern = test_pattern(width)
+    original = {key: getattr(printer, key) for key in PACING_KEYS}
+    try:
+        profile = await _calibrate(printer, pattern, v2, windows, delays)
+    except BaseException:
+        # Leave the printer paced as before rather than as the last probe was
+        printer.apply_pacing(original)
+        raise
+    printer.apply_pacing(profile)
+    pacing_profiles.save(printer.model, await printer.get_firmware(), profile)
+    return profile
+
+
+async def _calibrate(printer, pattern, v2, windows, delays):
+    largest = list(reversed(windows))
+    found = await _search(largest, lambda window: _trial(
+        printer, pattern, v2, {"stream_window": window, "window_delay": 0.0}))
+    if found is not None:
+        profile = {"stream_window": largest[found], "window_delay": 0.0}
+    else:
+        found = await _search(delays, lambda delay: _trial(
+            printer, pattern, v2, {"stream_window": windows[0], "window_delay": delay}))
+        if found is not None:
+            profile = {"stream_window": windows[0], "window_delay": delays[found]}
+        else:
+            found = await _search(delays, lambda delay: _trial(
+                printer, pattern, v2, {"stream_window": 0, "row_delay": delay}))
+            if found is None:
+                raise PrinterException("No pacing printed the test pattern cleanly")
+            profile = {"stream_window": 0, "row_delay": delays[found]}
+
+    return {"stream_window": 0, "window_delay": 0.0, "row_delay": 0.01, **profile}
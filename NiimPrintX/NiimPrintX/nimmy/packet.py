@@ -1,11 +1,103 @@
+import itertools
+import struct
+
 from devtools import debug
 
+# 0x55 0x55 type len ... checksum 0xAA 0xAA
+PACKET_OVERHEAD = 7
+
+_HEAD = struct.Struct(">HBB")
+_HEADER = b"\x55\x55"
+_TAIL = b"\xaa\xaa"
+
 
 def packet_to_int(x):
     return int.from_bytes(x.data, "big")
 
 
+def xor_checksum(data, seed=0):
+    """XOR of all bytes in ``data`` and ``seed``, folded through one integer
+    instead of a Python loop over the bytes."""
+    acc = int.from_bytes(data, "little")
+    width = 1 << (len(data) - 1).bit_length() if data else 1
+    while width > 1:
+        width >>= 1
+        acc ^= acc >> (width * 8)
+    return (acc & 0xFF) ^ seed
+
+
+def xor_checksums(chunks, slot):
+    """XOR-reduce every ``slot``-byte chunk of ``chunks`` at once.
+
+    ``slot`` must be a power of two. Folding the whole buffer onto itself
+    log2(slot) times leaves each chunk's XOR in its first byte; bytes past
+    the live half are never read back, so no masking is needed.
+    """
+    acc = int.from_bytes(chunks, "little")
+    width = slot
+    while width > 1:
+        width >>= 1
+        acc ^= acc >> (width * 8)
+    return acc.to_bytes(len(chunks), "little")[::slot]
+
+
+class PacketFrames:
+    """Framed packets of one job laid out back to back in a single buffer.
+
+    Iterating yields ``memoryview`` slices of the buffer, one per packet.
+    """
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        # Start of every packet plus the end of the last one
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return memoryview(self.buffer)[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        view = memoryview(self.buffer)
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield view[offsets[i]:offsets[i + 1]]
+
+    @property
+    def nbytes(self):
+        return len(self.buffer)
+
+
+def frame_packets(packets):
+    """Frame an iterable of NiimbotPacket into one contiguous PacketFrames."""
+    types = []
+    datas = []
+    for packet in packets:
+        types.append(packet.type)
+        datas.append(bytes(packet.data))
+    if not datas:
+        return PacketFrames(b"", [0])
+    lengths = [len(data) for data in datas]
+
+    # Checksummed bytes (type, len, data) of every packet, each in its own slot
+    slot = 1 << (max(lengths) + 1).bit_length()
+    pad = bytes(slot)
+    scratch = b"".join([bytes((t, n)) + data + pad[:slot - 2 - n] for t, n, data in zip(types, lengths, datas)])
+    checksums = xor_checksums(scratch, slot)
+
+    buffer = b"".join([_HEAD.pack(0x5555, t, n) + data + bytes((c,)) + _TAIL
+                       for t, n, data, c in zip(types, lengths, datas, checksums)])
+    offsets = [0]
+    offsets.extend(itertools.accumulate(n + PACKET_OVERHEAD for n in lengths))
+    return PacketFrames(buffer, offsets)
+
+
 class NiimbotPacket:
+    __slots__ = ("type", "data")
+
     def __init__(self, type_, data):
         self.type = type_
         self.data = data
@@ -18,20 +110,93 @@ class NiimbotPacket:
         len_ = pkt[3]
         data = pkt[4 : 4 + len_]
 
-        checksum = type_ ^ len_
-        for i in data:
-            checksum ^= i
+        checksum = xor_checksum(data, type_ ^ len_)
         assert checksum == pkt[-3]
 
         return cls(type_, data)
 
     def to_bytes(self):
-        checksum = self.type ^ len(self.data)
-        for i in self.data:
-            checksum ^= i
-        return bytes(
-            (0x55, 0x55, self.type, len(self.data), *self.data, checksum, 0xAA, 0xAA)
-        )
+        n = len(self.data)
+        checksum = xor_checksum(self.data, self.type ^ n)
+        return _HEAD.pack(0x5555, self.type, n) + bytes(self.data) + bytes((checksum, 0xAA, 0xAA))
 
     def __repr__(self):
-        return f"<NiimbotPacket type={self.type} data={self.data}>"
\ No newline at end of file
+        return f"<NiimbotPacket type={self.type} data={self.data}>"
+
+
+class PacketDeframer:
+    """Reassemble NiimbotPackets from a byte stream.
+
+    Notifications may carry part of a frame or several frames. ``feed``
+    buffers incomplete data and returns every complete packet. Bytes
+    outside a valid frame, and frames with a bad checksum or trailer, are
+    skipped by resynchronising on the next 0x55 0x55 header and counted
+    in ``dropped``.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.dropped = 0
+
+    def reset(self):
+        self._buffer.clear()
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        packets = []
+        pos = 0
+        while True:
+            start = buffer.find(_HEADER, pos)
+            if start < 0:
+                # A trailing 0x55 may be the first half of the next header
+                keep = len(buffer) - 1 if buffer.endswith(b"\x55") else len(buffer)
+                self.dropped += max(keep - pos, 0)
+                pos = max(keep, pos)
+                break
+            self.dropped += start - pos
+            pos = start
+            end = self._frame_end(buffer, pos)
+            if end is None:
+                # Incomplete; unless a later header already holds a whole
+                # frame, in which case this header was noise
+                later = self._next_frame(buffer, pos + 1)
+                if later is None:
+                    break
+                self.dropped += later - pos
+                pos = later
+                continue
+            if end < 0:
+                self.dropped += 1
+                pos += 1
+                continue
+            packets.append(NiimbotPacket(buffer[pos + 2], bytes(buffer[pos + 4:end - 3])))
+            pos = end
+        del buffer[:pos]
+        return packets
+
+    @staticmethod
+    def _frame_end(buffer, pos):
+        """End of the valid frame at ``pos``, None if incomplete or -1 if invalid."""
+        if len(buffer) - pos < 4:
+            return None
+        type_, n = buffer[pos + 2], buffer[pos + 3]
+        end = pos + n + PACKET_OVERHEAD
+        if len(buffer) < end:
+            return None
+        if buffer[end - 2:end] != _TAIL or xor_checksum(buffer[pos + 4:end - 3], type_ ^ n) != buffer[end - 3]:
+            return -1
+        return end
+
+    @classmethod
+    def _next_frame(cls, buffer, pos):
+        while (pos := buffer.find(_HEADER, pos)) >= 0:
+            end = cls._frame_end(buffer, pos)
+            if end is not None and end > 0:
+                return pos
+            pos += 1
+        return None
\ No newline at end of file
@@ -1,12 +1,20 @@
 import enum
 import asyncio
 import struct
-import math
-from PIL import Image, ImageOps
-from .exception import BLEException, PrinterException
-from .bluetooth import BLETransport
+import time
+from PIL import Image
+from .exception import PrinterException, PrinterTimeoutException, TransportException
+from .cache import frame_cache
+from .dither import dither_image
+from .jobfile import load_job
+from .latency import LatencyTracker
+from .pacing import PACING_KEYS, pacing_profiles
+from .bluetooth import ATT_OVERHEAD, BLETransport, CachedDevice, device_cache, find_device
 from .logger_config import get_logger
-from .packet import NiimbotPacket, packet_to_int
+from .models import get_model
+from .packet import NiimbotPacket, PacketDeframer, frame_packets
+from .raster import EncodeStats, encode_rows, pack_image
+from .response import decode_response
 
 from devtools import debug
 
@@ -42,295 +50,635 @@ class RequestCodeEnum(enum.IntEnum):
     GET_PRINT_STATUS = 163  # 0xA3
 
 
+class ResponseCodeEnum(enum.IntEnum):
+    NOT_SUPPORTED = 0  # 0x00
+    CHECK_LINE = 211  # 0xD3
+    PRINT_ERROR = 219  # 0xDB
+
+
+# Responses arrive as request code + 1 unless listed here
+RESPONSE_OFFSETS = {
+    RequestCodeEnum.SET_LABEL_TYPE: 16,
+    RequestCodeEnum.SET_LABEL_DENSITY: 16,
+    RequestCodeEnum.ALLOW_PRINT_CLEAR: 16,
+    RequestCodeEnum.GET_PRINT_STATUS: 16,
+}
+
+# Commands the printer can be sent twice without printing differently, which
+# send_command retries after a timeout; the late reply to a START_PAGE_PRINT
+# would otherwise answer its retry and hide a duplicate page
+RETRY_SAFE_COMMANDS = frozenset((
+    RequestCodeEnum.HEARTBEAT,
+    RequestCodeEnum.GET_INFO,
+    RequestCodeEnum.GET_RFID,
+    RequestCodeEnum.GET_PRINT_STATUS,
+    RequestCodeEnum.SET_LABEL_TYPE,
+    RequestCodeEnum.SET_LABEL_DENSITY,
+))
+
+# Heartbeat replies use a different code depending on the firmware
+HEARTBEAT_RESPONSES = (0xD9, 0xDD, 0xDE, 0xDF)
+
+
+def response_codes(request_code, data):
+    if request_code == RequestCodeEnum.GET_INFO:
+        return (request_code + data[0],)
+    if request_code == RequestCodeEnum.HEARTBEAT:
+        return HEARTBEAT_RESPONSES
+    return (request_code + RESPONSE_OFFSETS.get(request_code, 1),)
+
+
+def poll_schedule(first=0.02, factor=2, maximum=0.5):
+    delay = first
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
 class PrinterClient:
-    def __init__(self, device):
+    def __init__(self, device, transport=None):
         self.char_uuid = None
         self.device = device
-        self.transport = BLETransport()
-        self.notification_event = asyncio.Event()
-        self.notification_data = None
+        self.transport = transport or BLETransport()
+        # What the printer's model supports, see models.PRINTER_MODELS
+        self.capabilities = get_model(self.model)
+        self.compress_rows = self.capabilities.compressed_rows
+        # Dots across the print head, which the pixel counts in row headers refer to
+        self.printhead_width = self.capabilities.printhead_width
+        # Rows written without response before waiting for the printer; 0 acknowledges every row
+        self.stream_window = 16
+        self.stream_timeout = 1.0
+        # Pause after each acknowledged row write, and after each streamed window;
+        # a calibrated pacing profile overrides these on connect
+        self.row_delay = 0.01
+        self.window_delay = 0.0
+        # Times streaming stalled and fell back to acknowledged writes
+        self.stalls = 0
+        # Upper bound on printing time per page before giving up on the status
+        self.page_timeout = 5.0
+        # Round trips per command, which set the deadline for commands sent without a timeout
+        self.latency = LatencyTracker()
+        # Pack several row packets into one write up to the negotiated MTU
+        self.coalesce_rows = self.capabilities.coalesce
+        # Largest coalesced write, None for whatever the transport negotiated
+        self.max_write_size = self.capabilities.max_mtu - ATT_OVERHEAD if self.capabilities.max_mtu else None
+        # Framed rows of recently printed images, shared between clients; None disables it
+        self.frame_cache = frame_cache
+        # Encoded bands print_banner keeps ahead of the one being sent
+        self.band_queue = 4
+        self._notifying = False
+        self._credit = asyncio.Event()
+        # Settings the printer acknowledged on this connection, see invalidate_settings
+        self._settings = {}
+        self._closing_state = None
+        # (accepted response codes, future) in the order the requests were written
+        self._pending = []
+        self._deframer = PacketDeframer()
+        # time.monotonic() of the last connect or notification from the printer
+        self.last_seen = None
+        self.apply_pacing(self.transport.pacing or self.capabilities.pacing)
 
     async def connect(self):
+        if isinstance(self.device, CachedDevice):
+            try:
+                return await self._connect()
+            except Exception as e:
+                # The printer may have a new address or changed firmware, scan for it again
+                logger.info(f"Cached device {self.device.address} failed ({e}), rescanning")
+                device_cache.forget(self.device.address)
+                await self.transport.disconnect()
+                self.char_uuid = None
+                self._notifying = False
+                self.device = await find_device(self.device.name, use_cache=False)
+        return await self._connect()
+
+    async def _connect(self):
         if await self.transport.connect(self.device.address):
+            if not self.char_uuid:
+                self.char_uuid = getattr(self.device, "char_uuid", None)
             if not self.char_uuid:
                 await self.find_characteristics()
+            self.invalidate_settings()
+            self._deframer.reset()
+            # Subscriptions do not outlive a dropped link
+            self._notifying = False
+            await self._subscribe()
+            await self.load_pacing()
+            if isinstance(self.transport, BLETransport):
+                device_cache.remember(self.device.name, self.device.address, self.char_uuid)
+            self.last_seen = time.monotonic()
             logger.info(f"Successfully connected to {self.device.name}")
             return True
         logger.error("Connection failed.")
         return False
 
+    @property
+    def model(self):
+        # Printers advertise as <model>-<serial>, e.g. B1-H801122686
+        return self.device.name.split("-")[0].lower()
+
+    async def load_pacing(self):
+        """Apply the calibrated pacing profile for this model and firmware, if there is one."""
+        if self.transport.pacing is not None or not pacing_profiles.has_model(self.model):
+            return None
+        firmware = await self.get_firmware()
+        profile = pacing_profiles.get(self.model, firmware)
+        if profile:
+            self.apply_pacing(profile)
+            logger.info(f"Using pacing profile for {self.model} firmware {firmware}: {profile}")
+        return profile
+
+    def apply_pacing(self, profile):
+        for key in PACING_KEYS:
+            if key in profile:
+                setattr(self, key, profile[key])
+
     async def disconnect(self):
+        self._fail_pending(TransportException("Printer disconnected."))
+        self._notifying = False
+        self.invalidate_settings()
         await self.transport.disconnect()
         logger.info(f"Printer {self.device.name} disconnected.")
 
+    def invalidate_settings(self):
+        """Forget cached density and label type so they are sent again."""
+        self._settings.clear()
+
+    async def _subscribe(self):
+        # One subscription for the lifetime of the connection; responses are
+        # routed to their waiting request by notification_handler
+        if not self._notifying:
+            await self.transport.start_notification(self.char_uuid, self.notification_handler)
+            self._notifying = True
+
     async def find_characteristics(self):
-        services = {}
-        for service in self.transport.client.services:
-            s = []
-            for char in service.characteristics:
-                s.append({
-                    "id": char.uuid,
-                    "handle": char.handle,
-                    "properties": char.properties
-                })
-
-            services[service.uuid] = s
-
-        for service_id, characteristics in services.items():
-            if len(characteristics) == 1:  # Check if there's exactly one characteristic
-                props = characteristics[0]['properties']
-                if 'read' in props and 'write-without-response' in props and 'notify' in props:
-                    self.char_uuid = characteristics[0]['id']  # Return the service ID that meets the criteria
+        self.char_uuid = await self.transport.find_characteristic()
         if not self.char_uuid:
             raise PrinterException("Cannot find bluetooth characteristics.")
 
-    async def send_command(self, request_code, data, timeout=10):
+    async def send_command(self, request_code, data, timeout=None, retry=None):
+        """Send a command and return its response packet.
+
+        Without an explicit ``timeout`` the deadline comes from the round trips
+        measured for the command so far. A command that times out is sent once
+        more before PrinterTimeoutException is raised if ``retry`` is true, by
+        default if it is one of RETRY_SAFE_COMMANDS.
+        """
+        if retry is None:
+            retry = request_code in RETRY_SAFE_COMMANDS
         try:
-            if not self.transport.client or not self.transport.client.is_connected:
-                await self.connect()
-            packet = NiimbotPacket(request_code, data)
-            await self.transport.start_notification(self.char_uuid, self.notification_handler)
+            return await self._send_once(request_code, data, timeout)
+        except PrinterTimeoutException as e:
+            if not retry:
+                raise
+            logger.warning(f"{e}, retrying")
+        return await self._send_once(request_code, data, timeout)
+
+    async def _send_once(self, request_code, data, timeout):
+        if not self.transport.is_connected:
+            self._notifying = False
+            await self.connect()
+        await self._subscribe()
+        if timeout is None:
+            timeout = self.latency.timeout(request_code)
+        loop = asyncio.get_running_loop()
+        packet = NiimbotPacket(request_code, data)
+        waiter = (response_codes(request_code, data), loop.create_future())
+        self._pending.append(waiter)
+        try:
+            sent = loop.time()
             await self.transport.write(packet.to_bytes(), self.char_uuid)
             logger.debug(f"Printer command sent - {RequestCodeEnum(request_code).name}")
-            await asyncio.wait_for(self.notification_event.wait(), timeout)  # Wait until the notification event is set
-            response = NiimbotPacket.from_bytes(self.notification_data)
-            await self.transport.stop_notification(self.char_uuid)
-            self.notification_event.clear()  # Reset the event for the next notification
-            return response
+            response = await asyncio.wait_for(waiter[1], timeout)
         except asyncio.TimeoutError:
-            logger.error(f"Timeout occurred for request {RequestCodeEnum(request_code).name}")
-        except BLEException as e:
-            logger.error(f"An error occurred: {e}")
+            raise PrinterTimeoutException(
+                f"No response to {RequestCodeEnum(request_code).name} within {timeout:.2f}s") from None
+        finally:
+            if waiter in self._pending:
+                self._pending.remove(waiter)
+        self.latency.record(request_code, loop.time() - sent)
+        return response
 
     async def write_raw(self, data):
-        try:
-            if not self.transport.client or not self.transport.client.is_connected:
-                await self.connect()
-            await self.transport.write(data.to_bytes(), self.char_uuid, response=True)
-        except BLEException as e:
-            logger.error(f"An error occurred: {e}")
+        if not self.transport.is_connected:
+            await self.connect()
+        if isinstance(data, NiimbotPacket):
+            data = data.to_bytes()
+        await self.transport.write(data, self.char_uuid, response=True)
 
     async def write_no_notify(self, request_code, data):
-        try:
-            if not self.transport.client or not self.transport.client.is_connected:
-                await self.connect()
-            packet = NiimbotPacket(request_code, data)
-            await self.transport.write(packet.to_bytes(), self.char_uuid)
-        except BLEException as e:
-            logger.error(f"An error occurred: {e}")
+        if not self.transport.is_connected:
+            await self.connect()
+        packet = NiimbotPacket(request_code, data)
+        await self.transport.write(packet.to_bytes(), self.char_uuid)
 
     def notification_handler(self, sender, data):
-        # print(f"Notification from {sender}: {data}")
         logger.trace(f"Notification: {data}")
-        self.notification_data = data
-        self.notification_event.set()
+        self.last_seen = time.monotonic()
+        dropped = self._deframer.dropped
+        for packet in self._deframer.feed(data):
+            self._dispatch(packet)
+        if self._deframer.dropped != dropped:
+            logger.warning(f"Dropped {self._deframer.dropped - dropped} bytes of malformed notification data")
+
+    def _dispatch(self, packet):
+        if packet.type == ResponseCodeEnum.CHECK_LINE:
+            self._credit.set()
+            return
+        if packet.type in (ResponseCodeEnum.NOT_SUPPORTED, ResponseCodeEnum.PRINT_ERROR):
+            # Errors don't name the request they answer, so fail the oldest one
+            for codes, future in self._pending:
+                if not future.done():
+                    name = ResponseCodeEnum(packet.type).name
+                    future.set_exception(PrinterException(f"Printer replied {name} {packet.data.hex()}"))
+                    return
+            return
+        for codes, future in self._pending:
+            if packet.type in codes and not future.done():
+                future.set_result(packet)
+                return
+        logger.trace(f"Unsolicited packet: {packet}")
+
+    def _fail_pending(self, exc):
+        for codes, future in self._pending:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def print_labels(self, pages, density=None, vertical_offset=0, horizontal_offset=0, dither=None):
+        """Print ``(image, quantity)`` pages with the protocol the printer's model takes.
+
+        ``density`` is limited to the model's range and defaults to its usual
+        density."""
+        density = self.capabilities.clamp_density(density)
+        if self.capabilities.v2:
+            return await self.print_pagesV2(pages, density, vertical_offset, horizontal_offset, dither)
+        return await self.print_pages(pages, density, vertical_offset, horizontal_offset, dither)
 
     async def print_image(self, image: Image, density: int = 3, quantity: int = 1, vertical_offset= 0,
-                          horizontal_offset = 0):
-        await self.set_label_density(density)
-        await self.set_label_type(1)
-        await self.start_print()
-        await self.start_page_print()
-        await self.set_dimension(image.height, image.width)
-        await self.set_quantity(quantity)
-
-        for pkt in self._encode_image(image, vertical_offset, horizontal_offset):
-            # Send each line and wait for a response or status check
-            await self.write_raw(pkt)
-            # Adding a short delay or status check here can help manage buffer issues
-            await asyncio.sleep(0.01)  # Adjust the delay as needed based on printer feedback
+                          horizontal_offset = 0, dither=None):
+        return await self.print_pages([(image, quantity)], density, vertical_offset, horizontal_offset, dither)
 
-        while not await self.end_page_print():
-            await asyncio.sleep(0.05)
-
-        while True:
-            status = await self.get_print_status()
-            if status['page'] == quantity:
-                break
-            await asyncio.sleep(0.1)
+    async def print_imageV2(self, image: Image, density: int = 3, quantity: int = 1, vertical_offset=0,
+                            horizontal_offset=0, dither=None):
+        return await self.print_pagesV2([(image, quantity)], density, vertical_offset, horizontal_offset, dither)
+
+    async def print_pages(self, pages, density: int = 3, vertical_offset=0, horizontal_offset=0, dither=None):
+        """Print ``(image, quantity)`` pairs as consecutive pages of a single job.
+
+        ``dither`` names one of DITHER_METHODS; by default Pillow's own
+        conversion to 1-bit is used."""
+        return await self._print_frames(self._image_pages(pages, vertical_offset, horizontal_offset, dither), density)
+
+    async def print_pagesV2(self, pages, density: int = 3, vertical_offset=0, horizontal_offset=0, dither=None):
+        """Print ``(image, quantity)`` pairs as consecutive pages of a single job, see print_pages."""
+        pages = list(pages)
+        total = sum(quantity for _, quantity in pages)
+        return await self._print_frames(self._image_pages(pages, vertical_offset, horizontal_offset, dither), density,
+                                 v2=True, total=total)
+
+    async def print_bitmap(self, data, width, height, stride=None, density: int = 3, quantity: int = 1):
+        """Print packed 1-bit rows without going through an image.
+
+        ``data`` is any contiguous buffer: bytes, bytearray, memoryview or a
+        NumPy uint8 array. Each row starts every ``stride`` bytes, by default
+        ``ceil(width / 8)``, with pixels most significant bit first and set
+        bits black, as produced by ``numpy.packbits``. Rows are read straight
+        from the buffer."""
+        return await self._print_frames([self._bitmap_page(data, width, height, stride, quantity)], density)
+
+    async def print_bitmapV2(self, data, width, height, stride=None, density: int = 3, quantity: int = 1):
+        return await self._print_frames([self._bitmap_page(data, width, height, stride, quantity)], density,
+                                 v2=True, total=quantity)
+
+    async def print_job(self, job):
+        """Print a PrintJob, sending its prebuilt packets without touching the image."""
+        if job.model != self.model:
+            raise PrinterException(f"Job was encoded for {job.model.upper()}, not {self.model.upper()}")
+        page = (job.frames, job.width, job.height, job.quantity, EncodeStats())
+        return await self._print_frames([page], job.density, v2=job.v2, total=job.quantity)
+
+    async def _print_frames(self, pages, density, v2=False, total=None):
+        """Run one print job over ``(frames, width, height, quantity, stats)`` pages.
+
+        Pages may be produced lazily; V2 printers need the ``total`` copy count up front."""
+        await asyncio.gather(self.set_label_density(density), self.set_label_type(1))
+        if v2:
+            await self.start_printV2(quantity=total)
+        else:
+            await self.start_print()
+        printed = 0
+        for frames, width, height, quantity, stats in pages:
+            await self.start_page_print()
+            if v2:
+                await self.set_dimensionV2(height, width, quantity)
+            else:
+                await self.set_dimension(height, width)
+                await self.set_quantity(quantity)
+            await self._send_page(frames, stats)
+            printed += quantity
 
+        done = await self.wait_for_pages(printed)
         await self.end_print()
-
-    async def print_imageV2(self, image: Image, density: int = 3, quantity: int = 1, vertical_offset=0,
-                            horizontal_offset=0):
-        await self.set_label_density(density)
-        await self.set_label_type(1)
-        await self.start_printV2(quantity=quantity)
+        return done
+
+    async def print_job_file(self, path):
+        with load_job(path) as job:
+            return await self.print_job(job)
+
+    async def print_banner(self, bands, height, density: int = 3, quantity: int = 1, dither=None):
+        """Print an iterable of equally wide image bands as one page of ``height`` rows.
+
+        Bands are read, encoded and framed in a worker thread while earlier
+        ones are sent, holding at most ``band_queue`` encoded bands, so memory
+        stays bounded however long the banner is. See ``image_bands``."""
+        return await self._print_banner(bands, height, density, quantity, dither, v2=False)
+
+    async def print_bannerV2(self, bands, height, density: int = 3, quantity: int = 1, dither=None):
+        return await self._print_banner(bands, height, density, quantity, dither, v2=True)
+
+    async def _print_banner(self, bands, height, density, quantity, dither, v2):
+        bands = iter(bands)
+        stats = EncodeStats()
+        position = {"row": 0, "width": None}
+
+        def encode_next():
+            # Runs in a worker thread; returns None once the page is complete
+            y = position["row"]
+            band = next(bands, None)
+            if band is None:
+                if y >= height or position["width"] is None:
+                    return None
+                # Bands ran out early, blank the rest of the page
+                stride = (position["width"] + 7) // 8
+                position["row"] = height
+                return frame_packets(encode_rows(b"", 0, stride, self.compress_rows, stats, height - y, y,
+                                                 printhead_width=self.printhead_width))
+            if dither:
+                band = dither_image(band, dither)
+            data, width, rows, stride = pack_image(band)
+            if position["width"] is None:
+                position["width"] = width
+            elif width != position["width"]:
+                raise PrinterException(f"Banner band is {width} px wide, expected {position['width']}")
+            if y + rows > height:
+                raise PrinterException(f"Banner bands exceed its height of {height} rows")
+            position["row"] = y + rows
+            return frame_packets(encode_rows(data, rows, stride, self.compress_rows, stats, start_row=y,
+                                             printhead_width=self.printhead_width))
+
+        first = await asyncio.to_thread(encode_next)
+        if first is None:
+            raise PrinterException("Banner has no bands")
+
+        queue = asyncio.Queue(maxsize=self.band_queue)
+
+        async def produce():
+            try:
+                while (frames := await asyncio.to_thread(encode_next)) is not None:
+                    await queue.put(frames)
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        await asyncio.gather(self.set_label_density(density), self.set_label_type(1))
+        if v2:
+            await self.start_printV2(quantity=quantity)
+        else:
+            await self.start_print()
         await self.start_page_print()
-        await self.set_dimensionV2(image.height, image.width, quantity)
-
-        for pkt in self._encode_image(image, vertical_offset, horizontal_offset):
-            logger.debug(f"Sending packet: {pkt}")
-            await self.write_raw(pkt)
-            await asyncio.sleep(0.01)
-
-        await self.end_page_print()
-
-        await asyncio.sleep(2)  # Enhances reliability of the print job
-
-    def _encode_image(self, image: Image, vertical_offset=0, horizontal_offset=0):
-        # Convert the image to monochrome
-        img = ImageOps.invert(image.convert("L")).convert("1")
-
-        # Apply horizontal offset
-        if horizontal_offset > 0:
-            img = ImageOps.expand(img, border=(horizontal_offset, 0, 0, 0), fill=1)
+        if v2:
+            await self.set_dimensionV2(height, position["width"], quantity)
         else:
-            img = img.crop((-horizontal_offset, 0, img.width, img.height))
+            await self.set_dimension(height, position["width"])
+            await self.set_quantity(quantity)
 
-        # Add vertical padding for vertical offset
-        img = ImageOps.expand(img, border=(0, vertical_offset, 0, 0), fill=1)
-
-        for y in range(img.height):
-            line_data = [img.getpixel((x, y)) for x in range(img.width)]
-            line_data = "".join("0" if pix == 0 else "1" for pix in line_data)
-            line_data = int(line_data, 2).to_bytes(math.ceil(img.width / 8), "big")
-            counts = (0, 0, 0)  # It seems like you can always send zeros
-            header = struct.pack(">H3BB", y, *counts, 1)
-            pkt = NiimbotPacket(0x85, header + line_data)
-            yield pkt
+        producer = asyncio.create_task(produce())
+        try:
+            frames = first
+            while frames is not None:
+                if isinstance(frames, Exception):
+                    raise frames
+                await self._send_rows(frames)
+                frames = await queue.get()
+        finally:
+            producer.cancel()
+        logger.info(f"Banner sent: {stats}")
+        await self._end_page()
+
+        # Allow one page_timeout per label length of rows
+        done = await self.wait_for_pages(quantity, self.page_timeout * quantity * max(1, height / 400))
+        await self.end_print()
+        return done
+
+    async def _send_page(self, frames, stats):
+        await self._send_rows(frames)
+        logger.info(f"Image sent: {stats if stats.rows else f'{len(frames)} prebuilt packets'}")
+        await self._end_page()
+
+    async def _end_page(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.page_timeout
+        for delay in poll_schedule():
+            if await self.end_page_print():
+                return
+            if loop.time() + delay > deadline:
+                logger.warning("Printer did not accept the end of page in time")
+                return
+            await asyncio.sleep(delay)
+
+    async def wait_for_pages(self, pages, timeout=None):
+        """Poll the print status until ``pages`` pages are done, backing off
+        exponentially between polls. Returns False if the deadline passes first."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.page_timeout * pages)
+        for delay in poll_schedule():
+            status = await self.get_print_status()
+            if status and status.page >= pages:
+                return True
+            if loop.time() + delay > deadline:
+                logger.warning(f"Printer did not report {pages} page(s) done in time, last status {status}")
+                return False
+            await asyncio.sleep(delay)
+
+    async def _send_rows(self, frames):
+        streaming = self.stream_window > 0
+        window = []
+        writes = 0
+        for frame in frames:
+            if not streaming:
+                await self.write_raw(frame)
+                await asyncio.sleep(self.row_delay)
+                writes += 1
+                continue
+            window.append(frame)
+            if len(window) >= self.stream_window:
+                writes += await self._write_window(window)
+                window = []
+                if self.window_delay:
+                    await asyncio.sleep(self.window_delay)
+                if not await self._drain():
+                    logger.warning("Printer stalled while streaming, falling back to acknowledged writes")
+                    self.stalls += 1
+                    streaming = False
+        if window:
+            writes += await self._write_window(window)
+            await self._drain()
+        logger.debug(f"Rows sent in {writes} writes")
+        return writes
+
+    async def _write_window(self, window):
+        if self.coalesce_rows:
+            return await self.transport.write_packets(window, self.char_uuid, response=False,
+                                                      limit=self.max_write_size)
+        limit = min(self.max_write_size, self.transport.max_write_size) if self.max_write_size \
+            else self.transport.max_write_size
+        for data in window:
+            # Rows too long for one ATT packet go out as acknowledged long writes
+            await self.transport.write(data, self.char_uuid, response=len(data) > limit)
+        return len(window)
+
+    async def _drain(self):
+        # Writes arrive in order, so a heartbeat reply or a check-line notification
+        # means every row written before it has been taken by the printer
+        if self._credit.is_set():
+            self._credit.clear()
+            return True
+        barrier = asyncio.ensure_future(
+            self.send_command(RequestCodeEnum.HEARTBEAT, b"\x01", timeout=self.stream_timeout, retry=False))
+        credit = asyncio.ensure_future(self._credit.wait())
+        done, pending = await asyncio.wait((barrier, credit), return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        self._credit.clear()
+        ok = credit in done
+        if barrier in done:
+            # A missed heartbeat only means the window was not confirmed
+            ok = barrier.exception() is None or ok
+        return ok
+
+    def _image_pages(self, pages, vertical_offset, horizontal_offset, dither):
+        for image, quantity in pages:
+            stats = EncodeStats()
+            frames, width, height = self._page_frames(image, vertical_offset, horizontal_offset, stats, dither)
+            yield frames, width, height, quantity, stats
+
+    def _page_frames(self, image, vertical_offset=0, horizontal_offset=0, stats=None, dither=None):
+        """Return the framed rows of one page with the page width and height."""
+        if dither:
+            image = dither_image(image, dither)
+        data, width, height, stride = pack_image(image, vertical_offset, horizontal_offset)
+        return self._bitmap_frames(data, width, height, stride, 0, max(vertical_offset, 0), stats)
+
+    def _bitmap_page(self, data, width, height, stride, quantity):
+        view = memoryview(data)
+        if view.ndim != 1 or view.format != "B":
+            view = view.cast("B")
+        pitch = stride or (width + 7) // 8
+        if pitch * 8 < width or len(view) < pitch * (height - 1) + (width + 7) // 8:
+            raise PrinterException(f"A {len(view)} byte buffer cannot hold {height} rows of {width} px "
+                                   f"every {pitch} bytes")
+        stats = EncodeStats()
+        # Rows are left-aligned, the printer takes them right-aligned
+        frames, width, height = self._bitmap_frames(view, width, height, pitch, -width % 8, 0, stats)
+        return frames, width, height, quantity, stats
+
+    def _bitmap_frames(self, data, width, height, pitch, shift=0, row_offset=0, stats=None):
+        """Return framed rows of packed data with the page width and height, through frame_cache."""
+        key = None
+        if self.frame_cache is not None:
+            key = self.frame_cache.key(data, width, height, pitch, shift, row_offset, self.compress_rows,
+                                       self.printhead_width)
+            frames = self.frame_cache.get(key)
+            if frames is not None:
+                return frames, width, row_offset + height
+        stride = (width + 7) // 8
+        frames = frame_packets(encode_rows(data, height, stride, self.compress_rows, stats, row_offset,
+                                           pitch=pitch, shift=shift, printhead_width=self.printhead_width))
+        if key is not None:
+            self.frame_cache.put(key, frames)
+        return frames, width, row_offset + height
+
+    async def request(self, request_code, data):
+        """Send a command and return its decoded response."""
+        packet = await self.send_command(request_code, data)
+        return decode_response(packet.type, packet.data)
 
     async def get_info(self, key):
-        response = await self.send_command(RequestCodeEnum.GET_INFO, bytes((key,)))
-
-        match key:
-            case InfoEnum.DEVICESERIAL:
-                return response.data.hex()
-            case InfoEnum.SOFTVERSION:
-                return packet_to_int(response) / 100
-            case InfoEnum.HARDVERSION:
-                return packet_to_int(response) / 100
-            case _:
-                return packet_to_int(response)
+        return await self.request(RequestCodeEnum.GET_INFO, bytes((key,)))
 
-        return None
+    async def get_firmware(self):
+        return await self.get_info(InfoEnum.SOFTVERSION)
 
     async def get_rfid(self):
-        packet = await self.send_command(RequestCodeEnum.GET_RFID, b"\x01")
-        data = packet.data
-
-        if data[0] == 0:
-            return None
-        uuid = data[0:8].hex()
-        idx = 8
-
-        barcode_len = data[idx]
-        idx += 1
-        barcode = data[idx: idx + barcode_len].decode()
-
-        idx += barcode_len
-        serial_len = data[idx]
-        idx += 1
-        serial = data[idx: idx + serial_len].decode()
-
-        idx += serial_len
-        total_len, used_len, type_ = struct.unpack(">HHB", data[idx:])
-        return {
-            "uuid": uuid,
-            "barcode": barcode,
-            "serial": serial,
-            "used_len": used_len,
-            "total_len": total_len,
-            "type": type_,
-        }
+        return await self.request(RequestCodeEnum.GET_RFID, b"\x01")
 
     async def heartbeat(self):
-        packet = await self.send_command(RequestCodeEnum.HEARTBEAT, b"\x01")
-        closing_state = None
-        power_level = None
-        paper_state = None
-        rfid_read_state = None
-
-        match len(packet.data):
-            case 20:
-                paper_state = packet.data[18]
-                rfid_read_state = packet.data[19]
-            case 13:
-                closing_state = packet.data[9]
-                power_level = packet.data[10]
-                paper_state = packet.data[11]
-                rfid_read_state = packet.data[12]
-            case 19:
-                closing_state = packet.data[15]
-                power_level = packet.data[16]
-                paper_state = packet.data[17]
-                rfid_read_state = packet.data[18]
-            case 10:
-                closing_state = packet.data[8]
-                power_level = packet.data[9]
-                rfid_read_state = packet.data[8]
-            case 9:
-                closing_state = packet.data[8]
-
-        return {
-            "closing_state": closing_state,
-            "power_level": power_level,
-            "paper_state": paper_state,
-            "rfid_read_state": rfid_read_state,
-        }
+        try:
+            packet = await self.send_command(RequestCodeEnum.HEARTBEAT, b"\x01")
+        except (PrinterTimeoutException, TransportException):
+            # The printer may have rebooted or dropped the link
+            self.invalidate_settings()
+            raise
+        heartbeat = decode_response(packet.type, packet.data)
+        closing_state = heartbeat.closing_state
+        if closing_state != self._closing_state:
+            # Opening the lid to change the roll can reset the label settings
+            if self._closing_state is not None:
+                self.invalidate_settings()
+            self._closing_state = closing_state
+
+        return heartbeat
 
     async def set_label_type(self, n):
         assert 1 <= n <= 3
-        packet = await self.send_command(RequestCodeEnum.SET_LABEL_TYPE, bytes((n,)))
-        return bool(packet.data[0])
+        return await self._set_cached("label_type", RequestCodeEnum.SET_LABEL_TYPE, n)
 
     async def set_label_density(self, n):
         assert 1 <= n <= 5  # B21 has 5 levels, not sure for D11
-        packet = await self.send_command(RequestCodeEnum.SET_LABEL_DENSITY, bytes((n,)))
-        return bool(packet.data[0])
+        return await self._set_cached("density", RequestCodeEnum.SET_LABEL_DENSITY, n)
+
+    async def _set_cached(self, key, request_code, n):
+        if self._settings.get(key) == n:
+            logger.debug(f"Skipping {RequestCodeEnum(request_code).name}, already {n}")
+            return True
+        ok = await self.request(request_code, bytes((n,)))
+        if ok:
+            self._settings[key] = n
+        return ok
 
     async def start_print(self):
-        packet = await self.send_command(RequestCodeEnum.START_PRINT, b"\x01")
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.START_PRINT, b"\x01")
 
     async def start_printV2(self, quantity):
         assert 0 <= quantity <= 65535
         command = struct.pack('H', quantity)
-        packet = await self.send_command(RequestCodeEnum.START_PRINT, b'\x00' + command + b'\x00\x00\x00\x00')
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.START_PRINT, b'\x00' + command + b'\x00\x00\x00\x00')
 
     async def end_print(self):
-        packet = await self.send_command(RequestCodeEnum.END_PRINT, b"\x01")
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.END_PRINT, b"\x01")
 
     async def start_page_print(self):
-        packet = await self.send_command(RequestCodeEnum.START_PAGE_PRINT, b"\x01")
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.START_PAGE_PRINT, b"\x01")
 
     async def end_page_print(self):
-        packet = await self.send_command(RequestCodeEnum.END_PAGE_PRINT, b"\x01")
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.END_PAGE_PRINT, b"\x01")
 
     async def allow_print_clear(self):
-        packet = await self.send_command(RequestCodeEnum.ALLOW_PRINT_CLEAR, b"\x01")
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.ALLOW_PRINT_CLEAR, b"\x01")
 
     async def set_dimension(self, w, h):
-        packet = await self.send_command(
+        return await self.request(
             RequestCodeEnum.SET_DIMENSION, struct.pack(">HH", w, h)
         )
-        return bool(packet.data[0])
 
     async def set_dimensionV2(self, w, h, copies):
         logger.debug(f"Setting dimension: {w}x{h}")
-        packet = await self.send_command(
+        return await self.request(
             RequestCodeEnum.SET_DIMENSION, struct.pack(">HHH", w, h, copies)
         )
-        return bool(packet.data[0])
 
     async def set_quantity(self, n):
-        packet = await self.send_command(RequestCodeEnum.SET_QUANTITY, struct.pack(">H", n))
-        return bool(packet.data[0])
+        return await self.request(RequestCodeEnum.SET_QUANTITY, struct.pack(">H", n))
 
     async def get_print_status(self):
-        packet = await self.send_command(RequestCodeEnum.GET_PRINT_STATUS, b"\x01")
-        page, progress1, progress2 = struct.unpack(">HBB", packet.data)
-        return {"page": page, "progress1": progress1, "progress2": progress2}
-
-    def __del__(self):
-        if self.transport.client.is_connected:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(self.disconnect())
-            else:
-                loop.run_until_complete(self.disconnect())
+        return await self.request(RequestCodeEnum.GET_PRINT_STATUS, b"\x01")
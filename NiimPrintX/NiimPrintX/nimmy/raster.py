@@ -0,0 +1,199 @@
+import struct
+
+from PIL import Image
+
+from .packet import PACKET_OVERHEAD, NiimbotPacket
+
+INDEXED_ROW = 0x83
+EMPTY_ROW = 0x84
+BITMAP_ROW = 0x85
+
+MAX_REPEAT = 255
+
+_ROW_HEADER = struct.Struct(">H3BB")
+_EMPTY_HEADER = struct.Struct(">HB")
+_INVERT = bytes(range(255, -1, -1))
+
+
+class EncodeStats:
+    """Packet and byte counts for one encoded label, against one 0x85 packet per row."""
+
+    __slots__ = ("rows", "packets", "bytes", "raw_packets", "raw_bytes", "empty", "indexed", "bitmap")
+
+    def __init__(self):
+        self.rows = 0
+        self.packets = 0
+        self.bytes = 0
+        self.raw_packets = 0
+        self.raw_bytes = 0
+        self.empty = 0
+        self.indexed = 0
+        self.bitmap = 0
+
+    def add(self, packet):
+        self.packets += 1
+        self.bytes += PACKET_OVERHEAD + len(packet.data)
+        if packet.type == INDEXED_ROW:
+            self.indexed += 1
+        elif packet.type == EMPTY_ROW:
+            self.empty += 1
+        else:
+            self.bitmap += 1
+
+    @property
+    def ratio(self):
+        return self.bytes / self.raw_bytes if self.raw_bytes else 1.0
+
+    def __repr__(self):
+        return (f"<EncodeStats rows={self.rows} packets={self.packets}/{self.raw_packets} "
+                f"bytes={self.bytes}/{self.raw_bytes} ({self.ratio:.0%}) "
+                f"empty={self.empty} indexed={self.indexed} bitmap={self.bitmap}>")
+
+
+def pack_image(image: Image, vertical_offset=0, horizontal_offset=0):
+    """Convert an image to packed 1-bit rows where a set bit is a black dot.
+
+    Returns ``(data, width, height, stride)``. Each row is right-aligned within
+    its ``stride`` bytes, which matches the historical ``int(bits, 2)`` packing.
+    A positive horizontal offset adds blank columns on the left and a negative
+    one crops columns, both by masking and shifting bits; a negative vertical
+    offset drops rows. Positive vertical offsets are left to ``encode_rows``.
+    """
+    img = image if image.mode == "1" else image.convert("1")
+    width, height = img.size
+    src_stride = (width + 7) // 8
+    # Pillow rows are left-aligned and a set bit is white
+    data = img.tobytes().translate(_INVERT)
+
+    crop = min(max(-horizontal_offset, 0), width)
+    out_width = width - crop + max(horizontal_offset, 0)
+    stride = (out_width + 7) // 8
+    top = min(max(-vertical_offset, 0), height)
+    height -= top
+
+    pad = src_stride * 8 - width
+    if pad or crop:
+        # Clear the row padding and cropped columns, then right-align every row
+        # by shifting the whole image as one integer
+        row_mask = ((1 << (width - crop)) - 1) << pad
+        mask = int.from_bytes(row_mask.to_bytes(src_stride, "big") * (height + top), "big")
+        data = ((int.from_bytes(data, "big") & mask) >> pad).to_bytes(len(data), "big")
+    view = memoryview(data)[top * src_stride:]
+    if stride == src_stride:
+        return bytes(view), out_width, height, stride
+    if stride > src_stride:
+        fill = bytes(stride - src_stride)
+        rows = (fill + view[y * src_stride: (y + 1) * src_stride] for y in range(height))
+    else:
+        # Leading bytes only held cropped columns
+        skip = src_stride - stride
+        rows = (view[y * src_stride + skip: (y + 1) * src_stride] for y in range(height))
+    return b"".join(rows), out_width, height, stride
+
+
+def pixel_counts(row, printhead_width=None):
+    """Black-pixel count of each third of the printhead, as sent in the row header.
+
+    The thirds are ``printhead_width / 24`` bytes each, whatever the width of
+    the row; bytes past the printhead count towards the last third. Without a
+    ``printhead_width`` the counts are zero, which printers accept.
+    """
+    if not printhead_width:
+        return 0, 0, 0
+    chunk = printhead_width // 24 or 1
+    counts = [int.from_bytes(row[i: i + chunk], "big").bit_count() for i in range(0, chunk * 2, chunk)]
+    counts.append(int.from_bytes(row[chunk * 2:], "big").bit_count())
+    return tuple(counts)
+
+
+def pixel_indexes(row):
+    """Bit positions of the black pixels in a packed row, counted from the left."""
+    bits = int.from_bytes(row, "big")
+    last = len(row) * 8 - 1
+    indexes = []
+    while bits:
+        low = bits & -bits
+        indexes.append(last - (low.bit_length() - 1))
+        bits ^= low
+    indexes.reverse()
+    return indexes
+
+
+def row_packet(y, row, repeat=1, total=None, printhead_width=None):
+    """Return the cheapest packet for ``repeat`` copies of ``row`` starting at line ``y``."""
+    if total is None:
+        total = int.from_bytes(row, "big").bit_count()
+    if total == 0:
+        return NiimbotPacket(EMPTY_ROW, _EMPTY_HEADER.pack(y, repeat))
+    header = _ROW_HEADER.pack(y, *pixel_counts(row, printhead_width), repeat)
+    # Each indexed pixel costs two bytes against the full row bitmap
+    if total * 2 < len(row):
+        return NiimbotPacket(INDEXED_ROW, header + struct.pack(f">{total}H", *pixel_indexes(row)))
+    return NiimbotPacket(BITMAP_ROW, header + row)
+
+
+def encode_rows(data, height, stride, compress=True, stats=None, row_offset=0, start_row=0, pitch=None, shift=0,
+                printhead_width=None):
+    """Yield row packets for packed 1-bit image data.
+
+    With ``compress`` runs of identical rows are folded into a single packet
+    through its repeat count, blank rows use the empty-row packet and sparse
+    rows the indexed-pixel packet. Otherwise every row is sent as a 0x85
+    bitmap. ``row_offset`` blank rows are sent before the image, which starts
+    at that line. Line numbers begin at ``start_row``, for data that is one
+    band of a longer page. ``stats`` is filled in as packets are produced.
+
+    Rows are ``stride`` bytes read every ``pitch`` bytes of ``data``, which
+    defaults to ``stride``. Rows that are left-aligned instead of right-aligned
+    are shifted right by ``shift`` bits, dropping their padding.
+
+    Row headers count black pixels per third of ``printhead_width`` dots,
+    see ``pixel_counts``.
+    """
+    view = memoryview(data)
+    pitch = pitch or stride
+    if stats is not None:
+        stats.rows += row_offset + height
+        stats.raw_packets += row_offset + height
+        stats.raw_bytes += (row_offset + height) * (PACKET_OVERHEAD + _ROW_HEADER.size + stride)
+
+    blank = bytes(stride)
+    for y in range(0, row_offset, MAX_REPEAT if compress else 1):
+        repeat = min(MAX_REPEAT, row_offset - y) if compress else 1
+        packet = row_packet(start_row + y, blank, repeat, 0) if compress else \
+            NiimbotPacket(BITMAP_ROW, _ROW_HEADER.pack(start_row + y, 0, 0, 0, 1) + blank)
+        if stats is not None:
+            stats.add(packet)
+        yield packet
+
+    first = start_row + row_offset
+    y = 0
+    while y < height:
+        raw = bytes(view[y * pitch: y * pitch + stride])
+        row = (int.from_bytes(raw, "big") >> shift).to_bytes(stride, "big") if shift else raw
+        if compress:
+            repeat = 1
+            while y + repeat < height and repeat < MAX_REPEAT and \
+                    view[(y + repeat) * pitch: (y + repeat) * pitch + stride] == raw:
+                repeat += 1
+            packet = row_packet(first + y, row, repeat, printhead_width=printhead_width)
+        else:
+            repeat = 1
+            packet = NiimbotPacket(BITMAP_ROW, _ROW_HEADER.pack(first + y, *pixel_counts(row, printhead_width), 1) + row)
+        if stats is not None:
+            stats.add(packet)
+        yield packet
+        y += repeat
+
+
+def encode_image(image: Image, vertical_offset=0, horizontal_offset=0, compress=True, stats=None,
+                 printhead_width=None):
+    data, _, height, stride = pack_image(image, vertical_offset, horizontal_offset)
+    return encode_rows(data, height, stride, compress, stats, max(vertical_offset, 0),
+                       printhead_width=printhead_width)
+
+
+def image_bands(image: Image, rows=64):
+    """Yield ``image`` as horizontal bands of at most ``rows`` lines, for print_banner."""
+    for top in range(0, image.height, rows):
+        yield image.crop((0, top, image.width, min(top + rows, image.height)))
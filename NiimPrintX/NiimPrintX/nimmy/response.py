@@ -0,0 +1,146 @@
+import struct
+
+# Response code -> decoder taking the packet data
+RESPONSE_DECODERS = {}
+
+
+def register(*codes):
+    def wrap(decoder):
+        for code in codes:
+            RESPONSE_DECODERS[code] = decoder
+        return decoder
+
+    return wrap
+
+
+def decode_response(code, data):
+    """Decode a response payload with the decoder registered for ``code``.
+
+    Codes without a decoder return the payload unchanged.
+    """
+    decoder = RESPONSE_DECODERS.get(code)
+    if decoder is None:
+        return data
+    return decoder(data)
+
+
+class Response:
+    """Slotted response record that also reads like the dicts it replaces."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def keys(self):
+        return self.__slots__
+
+    def _asdict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __eq__(self, other):
+        if isinstance(other, Response):
+            return type(self) is type(other) and self._asdict() == other._asdict()
+        return self._asdict() == other
+
+    def __repr__(self):
+        fields = " ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"<{type(self).__name__} {fields}>"
+
+
+class Heartbeat(Response):
+    __slots__ = ("closing_state", "power_level", "paper_state", "rfid_read_state")
+
+    def __init__(self, closing_state=None, power_level=None, paper_state=None, rfid_read_state=None):
+        self.closing_state = closing_state
+        self.power_level = power_level
+        self.paper_state = paper_state
+        self.rfid_read_state = rfid_read_state
+
+
+class PrintStatus(Response):
+    __slots__ = ("page", "progress1", "progress2")
+
+    def __init__(self, page, progress1, progress2):
+        self.page = page
+        self.progress1 = progress1
+        self.progress2 = progress2
+
+
+class RfidInfo(Response):
+    __slots__ = ("uuid", "barcode", "serial", "used_len", "total_len", "type")
+
+    def __init__(self, uuid, barcode, serial, used_len, total_len, type_):
+        self.uuid = uuid
+        self.barcode = barcode
+        self.serial = serial
+        self.used_len = used_len
+        self.total_len = total_len
+        self.type = type_
+
+
+# Heartbeat layouts by payload length: struct and the field each value fills
+_HEARTBEAT_LAYOUTS = {
+    20: (struct.Struct(">18x2B"), ("paper_state", "rfid_read_state")),
+    13: (struct.Struct(">9x4B"), ("closing_state", "power_level", "paper_state", "rfid_read_state")),
+    19: (struct.Struct(">15x4B"), ("closing_state", "power_level", "paper_state", "rfid_read_state")),
+    10: (struct.Struct(">8x2B"), ("closing_state", "power_level")),
+    9: (struct.Struct(">8xB"), ("closing_state",)),
+}
+_PRINT_STATUS = struct.Struct(">HBB")
+_RFID_TAIL = struct.Struct(">HHB")
+
+
+@register(0xD9, 0xDD, 0xDE, 0xDF)
+def decode_heartbeat(data):
+    heartbeat = Heartbeat()
+    layout = _HEARTBEAT_LAYOUTS.get(len(data))
+    if layout:
+        layout_struct, fields = layout
+        for field, value in zip(fields, layout_struct.unpack_from(data)):
+            setattr(heartbeat, field, value)
+        if len(data) == 10:
+            heartbeat.rfid_read_state = heartbeat.closing_state
+    return heartbeat
+
+
+@register(0xB3)
+def decode_print_status(data):
+    return PrintStatus(*_PRINT_STATUS.unpack_from(data))
+
+
+@register(0x1B)
+def decode_rfid(data):
+    if data[0] == 0:
+        return None
+    view = memoryview(data)
+    idx = 8
+    barcode_len = view[idx]
+    barcode = bytes(view[idx + 1: idx + 1 + barcode_len]).decode()
+    idx += 1 + barcode_len
+    serial_len = view[idx]
+    serial = bytes(view[idx + 1: idx + 1 + serial_len]).decode()
+    idx += 1 + serial_len
+    total_len, used_len, type_ = _RFID_TAIL.unpack_from(view, idx)
+    return RfidInfo(bytes(view[:8]).hex(), barcode, serial, used_len, total_len, type_)
+
+
+# Replies to START_PRINT, START_PAGE_PRINT, SET_DIMENSION, SET_QUANTITY,
+# END_PAGE_PRINT, END_PRINT, ALLOW_PRINT_CLEAR, SET_LABEL_DENSITY and SET_LABEL_TYPE
+@register(0x02, 0x04, 0x14, 0x16, 0xE4, 0xF4, 0x30, 0x31, 0x33)
+def decode_ack(data):
+    return bool(data[0])
+
+
+def _decode_int(data):
+    return int.from_bytes(data, "big")
+
+
+def _decode_version(data):
+    return int.from_bytes(data, "big") / 100
+
+
+# GET_INFO answers with 0x40 + the InfoEnum key
+register(0x40 + 1, 0x40 + 2, 0x40 + 3, 0x40 + 6, 0x40 + 7, 0x40 + 8, 0x40 + 10)(_decode_int)
+register(0x40 + 9, 0x40 + 12)(_decode_version)
+register(0x40 + 11)(lambda data: bytes(data).hex())
@@ -0,0 +1,122 @@
+import asyncio
+
+import serial
+
+from .exception import TransportException
+from .logger_config import get_logger
+from .transport import Transport
+
+logger = get_logger()
+
+SERIAL_CHAR_UUID = "serial"
+
+
+class SerialDevice:
+    """A printer on a serial port, usable wherever a scanned device is.
+
+    ``name`` should start with the model, e.g. B1-USB, as advertised names do.
+    """
+
+    def __init__(self, name, address):
+        self.name = name
+        self.address = address
+
+    def __repr__(self):
+        return f"<SerialDevice name={self.name} port={self.address}>"
+
+
+class SerialTransport(Transport):
+    """Transport over the USB CDC serial port several printers, the B1 among
+    them, expose next to BLE.
+
+    The same packets travel over the port. A reader task hands whatever
+    arrives to the notification handler, and writes are not bounded by an
+    ATT MTU, so rows go out in large writes without BLE's pacing.
+    """
+
+    # Replaces the model's BLE pacing defaults and calibrated profiles
+    pacing = {"stream_window": 64, "window_delay": 0.0, "row_delay": 0.0}
+
+    def __init__(self, baudrate=115200, write_size=4096, read_timeout=0.05, write_timeout=2.0):
+        self.baudrate = baudrate
+        self.write_size = write_size
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self._port = None
+        self._handler = None
+        self._reader = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def is_connected(self):
+        return bool(self._port and self._port.is_open)
+
+    @property
+    def max_write_size(self):
+        return self.write_size
+
+    async def connect(self, address):
+        if self.is_connected:
+            if self._port.port == address:
+                return False
+            await self.disconnect()
+        try:
+            self._port = await asyncio.to_thread(
+                serial.Serial, address, self.baudrate, timeout=self.read_timeout, write_timeout=self.write_timeout)
+        except (serial.SerialException, OSError) as e:
+            raise TransportException(f"Cannot open serial port {address}: {e}") from e
+        logger.info(f"Opened serial port {address}")
+        return True
+
+    async def disconnect(self):
+        await self.stop_notification(SERIAL_CHAR_UUID)
+        if self._port is not None:
+            self._port.close()
+            self._port = None
+
+    async def find_characteristic(self):
+        return SERIAL_CHAR_UUID
+
+    async def write(self, data, char_uuid, response=None):
+        if not self.is_connected:
+            raise TransportException("Serial port is not open.")
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(self._port.write, bytes(data))
+            except (serial.SerialException, OSError) as e:
+                self._lost(e)
+                raise TransportException(f"Serial write failed: {e}") from e
+
+    async def start_notification(self, char_uuid, handler):
+        if not self.is_connected:
+            raise TransportException("Serial port is not open.")
+        self._handler = handler
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop(self._port))
+
+    async def stop_notification(self, char_uuid):
+        self._handler = None
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+    async def _read_loop(self, port):
+        while True:
+            try:
+                # Returns what has arrived, or nothing once read_timeout passes
+                data = await asyncio.to_thread(lambda: port.read(max(1, port.in_waiting)))
+            except (serial.SerialException, OSError) as e:
+                self._lost(e)
+                return
+            if data and self._handler:
+                self._handler(self, data)
+
+    def _lost(self, error):
+        if self._port is not None:
+            logger.warning(f"Serial port {self._port.port} lost: {error}")
+            self._port.close()
+            self._port = None
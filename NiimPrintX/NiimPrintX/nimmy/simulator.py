@@ -0,0 +1,280 @@
+import asyncio
+import math
+import random
+import struct
+
+from PIL import Image, ImageOps
+
+from .exception import TransportException
+from .packet import NiimbotPacket, PacketDeframer
+from .printer import InfoEnum, RequestCodeEnum, ResponseCodeEnum, response_codes
+from .raster import BITMAP_ROW, EMPTY_ROW
+from .transport import Transport
+
+SIM_CHAR_UUID = "simulated"
+MAX_LONG_WRITE = 512
+
+
+class SimulatedDevice:
+    def __init__(self, name, address="SIM:00:00:00:00:00"):
+        self.name = name
+        self.address = address
+
+    def __repr__(self):
+        return f"<SimulatedDevice name={self.name}>"
+
+
+class SimulatedPrinter:
+    """NIIMBOT protocol state machine that answers request packets and
+    rebuilds every printed page as an image in ``pages``."""
+
+    def __init__(self, name="B1-SIM", page_time=0.0):
+        self.name = name
+        # Seconds the simulated print head needs per copy
+        self.page_time = page_time
+        self.info = {
+            InfoEnum.DENSITY: 3,
+            InfoEnum.PRINTSPEED: 1,
+            InfoEnum.LABELTYPE: 1,
+            InfoEnum.LANGUAGETYPE: 1,
+            InfoEnum.AUTOSHUTDOWNTIME: 4,
+            InfoEnum.DEVICETYPE: 4096,
+            InfoEnum.SOFTVERSION: 512,
+            InfoEnum.BATTERY: 4,
+            InfoEnum.DEVICESERIAL: bytes.fromhex("53494d0001"),
+            InfoEnum.HARDVERSION: 100,
+        }
+        self.closing_state = 0
+        self.power_level = 4
+        self.paper_state = 0
+        self.rfid_read_state = 1
+        self.rfid = {
+            "uuid": bytes.fromhex("0102030405060708"),
+            "barcode": "6972842743589",
+            "serial": "SIM0000001",
+            "total_len": 230,
+            "used_len": 0,
+            "type": 1,
+        }
+        self.density = None
+        self.label_type = None
+        self.pages = []
+        self.errors = []
+        self._quantity = 1
+        self._page = None
+        self._rows = None
+        self._covered = 0
+        self._done_at = []
+
+    def handle(self, packet, now=0.0):
+        """Apply one request packet and return the response packet, if any."""
+        match packet.type:
+            case 0x83 | 0x84 | 0x85:
+                self._receive_row(packet)
+                return None
+            case RequestCodeEnum.GET_INFO:
+                data = self._get_info(packet.data[0])
+            case RequestCodeEnum.GET_RFID:
+                data = self._get_rfid()
+            case RequestCodeEnum.HEARTBEAT:
+                data = bytes(9) + bytes((self.closing_state, self.power_level, self.paper_state,
+                                          self.rfid_read_state))
+                return NiimbotPacket(0xDD, data)
+            case RequestCodeEnum.SET_LABEL_TYPE:
+                self.label_type = packet.data[0]
+                data = b"\x01"
+            case RequestCodeEnum.SET_LABEL_DENSITY:
+                self.density = packet.data[0]
+                data = b"\x01"
+            case RequestCodeEnum.START_PRINT:
+                self._done_at = []
+                data = b"\x01"
+            case RequestCodeEnum.START_PAGE_PRINT:
+                self._page = None
+                data = b"\x01"
+            case RequestCodeEnum.SET_QUANTITY:
+                self._quantity, = struct.unpack(">H", packet.data)
+                data = b"\x01"
+            case RequestCodeEnum.SET_DIMENSION:
+                self._set_dimension(packet.data)
+                data = b"\x01"
+            case RequestCodeEnum.END_PAGE_PRINT:
+                if self._page is not None and self._covered < self._page[0]:
+                    # Rows went missing on the way, as when the print buffer overflows
+                    self.errors.append(f"Page ended after {self._covered} of {self._page[0]} rows")
+                    self._page = None
+                    return NiimbotPacket(ResponseCodeEnum.PRINT_ERROR, b"\x00")
+                data = bytes((self._end_page(now),))
+            case RequestCodeEnum.GET_PRINT_STATUS:
+                page = sum(1 for done_at in self._done_at if done_at <= now)
+                progress = 100 if page == len(self._done_at) else 0
+                data = struct.pack(">HBB", page, progress, progress)
+            case RequestCodeEnum.END_PRINT | RequestCodeEnum.ALLOW_PRINT_CLEAR:
+                data = b"\x01"
+            case _:
+                return NiimbotPacket(ResponseCodeEnum.NOT_SUPPORTED, b"\x00")
+        return NiimbotPacket(response_codes(packet.type, packet.data)[0], data)
+
+    def _get_info(self, key):
+        value = self.info.get(key, 0)
+        if isinstance(value, bytes):
+            return value
+        return value.to_bytes(2 if value > 255 else 1, "big")
+
+    def _get_rfid(self):
+        rfid = self.rfid
+        barcode = rfid["barcode"].encode()
+        serial = rfid["serial"].encode()
+        return (rfid["uuid"] + bytes((len(barcode),)) + barcode + bytes((len(serial),)) + serial +
+                struct.pack(">HHB", rfid["total_len"], rfid["used_len"], rfid["type"]))
+
+    def _set_dimension(self, data):
+        if len(data) >= 6:
+            height, width, copies = struct.unpack_from(">HHH", data)
+        else:
+            height, width = struct.unpack_from(">HH", data)
+            copies = None
+        self._page = [height, width, copies]
+        self._rows = bytearray(height * math.ceil(width / 8))
+        self._covered = 0
+
+    def _receive_row(self, packet):
+        if self._page is None:
+            self.errors.append(f"Row packet 0x{packet.type:02X} outside of a page")
+            return
+        height, width, _ = self._page
+        stride = math.ceil(width / 8)
+        y, = struct.unpack_from(">H", packet.data)
+        if packet.type == EMPTY_ROW:
+            self._covered += packet.data[2]
+            return
+        repeat = packet.data[5]
+        if packet.type == BITMAP_ROW:
+            row = bytes(packet.data[6:])
+        else:
+            bits = 0
+            for index in struct.unpack(f">{(len(packet.data) - 6) // 2}H", packet.data[6:]):
+                bits |= 1 << (stride * 8 - 1 - index)
+            row = bits.to_bytes(stride, "big")
+        if len(row) != stride or y + repeat > height:
+            self.errors.append(f"Row {y} x{repeat} does not fit a {width}x{height} page")
+            return
+        self._rows[y * stride: (y + repeat) * stride] = row * repeat
+        self._covered += repeat
+
+    def _end_page(self, now):
+        if self._page is None:
+            return 0
+        height, width, copies = self._page
+        stride = math.ceil(width / 8)
+        # Rows are right-aligned within their bytes; set bits are black dots
+        img = Image.frombytes("1", (stride * 8, height), bytes(self._rows))
+        img = ImageOps.invert(img.convert("L")).crop((stride * 8 - width, 0, stride * 8, height)).convert("1")
+        self.pages.append(img)
+        start = max([now] + self._done_at[-1:])
+        for copy in range(copies or self._quantity):
+            self._done_at.append(start + self.page_time * (copy + 1))
+        self._page = None
+        return 1
+
+
+class SimulatedTransport(Transport):
+    """Transport that talks to an in-process SimulatedPrinter.
+
+    ``latency`` is added to every write, ``mtu`` bounds the size of writes
+    without response like a negotiated ATT MTU and ``drop_rate`` is the fraction of writes lost.
+    With ``notify_size`` replies are split into notifications of at most
+    that many bytes, as some BLE stacks deliver them.
+
+    ``drain_rate`` (bytes per second) and ``buffer_size`` model the printer's
+    receive buffer: replies wait until everything written before them has
+    drained, and writes that would overflow the buffer are lost and counted
+    in ``overruns``.
+    """
+
+    def __init__(self, printer=None, latency=0.0, mtu=185, drop_rate=0.0, seed=None, notify_size=None,
+                 drain_rate=None, buffer_size=4096):
+        self.printer = printer or SimulatedPrinter()
+        self.latency = latency
+        self.mtu = mtu
+        self.drop_rate = drop_rate
+        self.notify_size = notify_size
+        self.drain_rate = drain_rate
+        self.buffer_size = buffer_size
+        self.overruns = 0
+        self._level = 0.0
+        self._drained_at = 0.0
+        self.writes = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._connected = False
+        self._handler = None
+        self._deframer = PacketDeframer()
+
+    @property
+    def device(self):
+        return SimulatedDevice(self.printer.name)
+
+    @property
+    def is_connected(self):
+        return self._connected
+
+    @property
+    def max_write_size(self):
+        return self.mtu - 3
+
+    async def connect(self, address):
+        if self._connected:
+            return False
+        self._connected = True
+        self._deframer.reset()
+        return True
+
+    async def disconnect(self):
+        self._connected = False
+        self._handler = None
+
+    async def find_characteristic(self):
+        return SIM_CHAR_UUID
+
+    async def write(self, data, char_uuid, response=None):
+        if not self._connected:
+            raise TransportException("Simulated printer is not connected.")
+        # Writes with response may be split into a long write, up to an attribute's 512 bytes
+        if len(data) > (MAX_LONG_WRITE if response else self.max_write_size):
+            raise TransportException(f"Write of {len(data)} bytes exceeds MTU {self.mtu}")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        self.writes += 1
+        self.bytes_written += len(data)
+
+        loop = asyncio.get_running_loop()
+        delay = 0.0
+        if self.drain_rate:
+            now = loop.time()
+            self._level = max(0.0, self._level - (now - self._drained_at) * self.drain_rate)
+            self._drained_at = now
+            if self._level + len(data) > self.buffer_size:
+                self.overruns += 1
+                return
+            self._level += len(data)
+            delay = self._level / self.drain_rate
+        for packet in self._deframer.feed(data):
+            reply = self.printer.handle(packet, loop.time())
+            if reply is not None and self._handler:
+                reply = reply.to_bytes()
+                size = self.notify_size or len(reply)
+                for i in range(0, len(reply), size):
+                    loop.call_later(delay, self._handler, self, reply[i:i + size])
+
+    async def start_notification(self, char_uuid, handler):
+        if not self._connected:
+            raise TransportException("Simulated printer is not connected.")
+        self._handler = handler
+
+    async def stop_notification(self, char_uuid):
+        self._handler = None
@@ -0,0 +1,98 @@
+from abc import ABC, abstractmethod
+
+# Ways make_transport can reach a printer
+TRANSPORTS = ("ble", "usb", "sim")
+
+
+class Transport(ABC):
+    """Byte pipe between PrinterClient and a printer.
+
+    Implementations call the handler given to ``start_notification`` with
+    ``(sender, data)`` on the event loop for every notification received.
+    """
+
+    # Pacing that replaces the model's defaults and calibrated profiles, for
+    # links without BLE's throughput limits; None keeps them
+    pacing = None
+
+    @property
+    @abstractmethod
+    def is_connected(self):
+        ...
+
+    @property
+    @abstractmethod
+    def max_write_size(self):
+        """Largest payload a single ``write`` can carry."""
+
+    @abstractmethod
+    async def connect(self, address):
+        ...
+
+    @abstractmethod
+    async def disconnect(self):
+        ...
+
+    @abstractmethod
+    async def find_characteristic(self):
+        """Return the id to pass as ``char_uuid``, or None if the printer has none usable."""
+
+    @abstractmethod
+    async def write(self, data, char_uuid, response=None):
+        ...
+
+    @abstractmethod
+    async def start_notification(self, char_uuid, handler):
+        ...
+
+    @abstractmethod
+    async def stop_notification(self, char_uuid):
+        ...
+
+    async def write_packets(self, packets, char_uuid, response=False, limit=None):
+        """Write already framed packets, packing as many whole packets into each
+        write as ``max_write_size``, or a smaller ``limit``, allows. Returns the
+        number of writes made.
+
+        A packet larger than that on its own is written with response, which
+        the stack may split over several ATT packets where a write without
+        response must fit in one.
+        """
+        limit = min(limit, self.max_write_size) if limit else self.max_write_size
+        writes = 0
+        chunk = bytearray()
+        for data in packets:
+            if chunk and len(chunk) + len(data) > limit:
+                await self.write(chunk, char_uuid, response=response)
+                writes += 1
+                chunk = bytearray()
+            if len(data) > limit:
+                await self.write(data, char_uuid, response=True)
+                writes += 1
+                continue
+            chunk += data
+        if chunk:
+            await self.write(chunk, char_uuid, response=response)
+            writes += 1
+        return writes
+
+
+def make_transport(kind, model, port=None):
+    """Return ``(device, transport)`` for a printer of ``model`` reached over
+    ``kind``, one of TRANSPORTS.
+
+    "usb" uses the serial port ``port`` and "sim" an in-process simulated
+    printer. For "ble" both are None: the device is found by scanning and
+    PrinterClient makes its own BLETransport.
+    """
+    if kind == "sim":
+        from .simulator import SimulatedPrinter, SimulatedTransport
+        transport = SimulatedTransport(SimulatedPrinter(f"{model.upper()}-SIM"))
+        return transport.device, transport
+    if kind == "usb":
+        # pyserial is only needed, and only imported, for USB printers
+        from .serialport import SerialDevice, SerialTransport
+        return SerialDevice(f"{model.upper()}-USB", port), SerialTransport()
+    if kind == "ble":
+        return None, None
+    raise ValueError(f"Unknown transport {kind!r}, expected one of {', '.join(TRANSPORTS)}")
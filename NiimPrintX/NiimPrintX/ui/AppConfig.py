@@ -1,6 +1,9 @@
 import os
 import appdirs
 import platform
+
+from NiimPrintX.nimmy.models import PRINTER_MODELS
+
 class AppConfig:
     def __init__(self):
         self.os_system = platform.system()
@@ -15,45 +18,10 @@ class AppConfig:
         self.canvas = None
         self.bounding_box = None
         self.device = None
+        # Models the designer offers, with their label rolls and highest density
         self.label_sizes = {
-            "d110": {
-                "size": {
-                    "30mm x 15mm": (30, 15),
-                    "40mm x 12mm": (40, 12),
-                    "50mm x 14mm": (50, 14),
-                    "75mm x 12mm": (75, 12),
-                    "109mm x 12.5mm": (109, 12.5),
-                },
-                "density": 3
-            },
-            "d11": {
-                "size": {
-                    "30mm x 14mm": (30, 14),
-                    "40mm x 12mm": (40, 12),
-                    "50mm x 14mm": (50, 14),
-                    "75mm x 12mm": (75, 12),
-                    "109mm x 12.5mm": (109, 12.5),
-                },
-                "density": 3
-            },
-            "d101": {
-                "size": {
-                    "30mm x 14mm": (30, 14),
-                    "40mm x 12mm": (40, 12),
-                    "50mm x 14mm": (50, 14),
-                    "75mm x 12mm": (75, 12),
-                    "109mm x 12.5mm": (109, 12.5),
-                },
-                "density": 3
-            },
-            "b18": {
-                "size": {
-                    "40mm x 14mm": (40, 14),
-                    "50mm x 14mm": (50, 14),
-                    "120mm x 14mm": (120, 14),
-                },
-                "density": 3
-            }
+            name: {"size": model.label_sizes, "density": model.density[1]}
+            for name, model in PRINTER_MODELS.items() if model.label_sizes
         }
         self.current_label_size = None
         self.frames = {}
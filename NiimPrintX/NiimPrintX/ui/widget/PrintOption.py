@@ -9,6 +9,8 @@ import PIL
 import cairo
 import tempfile
 
+from NiimPrintX.nimmy.dither import DITHER_METHODS
+
 from .PrinterOperation import PrinterOperation
 
 from devtools import debug
@@ -30,7 +32,7 @@ class PrintOption:
     async def schedule_heartbeat(self):
         while True:
             # debug(self.config.printer_connected, self.config.print_job)
-            if self.print_op.printer and not self.config.print_job:
+            if self.print_op.printer:
                 # debug("connected")
                 state, hb = await self.print_op.heartbeat()
                 self.root.after(0, lambda: self.update_status(state, hb))
@@ -209,6 +211,17 @@ class PrintOption:
                                          )
         print_copy_dropdown.grid(row=0, column=3, padx=5, pady=5, sticky="w")
 
+        # Photos print better dithered than thresholded
+        tk.Label(option_frame, text="Dither").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        self.print_dither = tk.StringVar()
+        self.print_dither.set("floyd-steinberg")
+        dither_dropdown = ttk.Combobox(option_frame, values=DITHER_METHODS,
+                                       textvariable=self.print_dither,
+                                       state="readonly",
+                                       width=14
+                                       )
+        dither_dropdown.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky="w")
+
         offset_frame = tk.Frame(popup)
         offset_frame.grid(row=2, column=0, columnspan=4, padx=20, pady=10, sticky="ew")
 
@@ -279,7 +292,7 @@ class PrintOption:
 
         image = image.rotate(-int(90), PIL.Image.NEAREST, expand=True)
         future = asyncio.run_coroutine_threadsafe(
-            self.print_op.print(image, density, quantity), self.root.async_loop
+            self.print_op.print(image, density, quantity, self.print_dither.get()), self.root.async_loop
         )
         future.add_done_callback(lambda f: self._print_handler(f))
 
@@ -35,12 +35,12 @@ class PrinterOperation:
             messagebox.showerror("Error", f"{str(e)}.")
             return False
 
-    async def print(self, image, density, quantity):
+    async def print(self, image, density, quantity, dither=None):
         try:
             if not self.config.printer_connected or not self.printer:
                 await self.printer_connect(self.config.device)
 
-            await self.printer.print_image(image, density, quantity)
+            await self.printer.print_labels([(image, quantity)], density, dither=dither)
             return True
         except Exception as e:
             messagebox.showerror("Error", f"{str(e)}.")
@@ -0,0 +1,72 @@
+import math
+import struct
+import time
+
+import click
+from PIL import Image, ImageDraw, ImageOps
+
+from NiimPrintX.nimmy.packet import NiimbotPacket
+from NiimPrintX.nimmy.raster import EncodeStats, encode_image
+
+
+def legacy_encode_image(image, vertical_offset=0, horizontal_offset=0):
+    # Per-pixel encoder that shipped before NiimPrintX.nimmy.raster
+    img = ImageOps.invert(image.convert("L")).convert("1")
+    if horizontal_offset > 0:
+        img = ImageOps.expand(img, border=(horizontal_offset, 0, 0, 0), fill=1)
+    else:
+        img = img.crop((-horizontal_offset, 0, img.width, img.height))
+    img = ImageOps.expand(img, border=(0, vertical_offset, 0, 0), fill=1)
+
+    for y in range(img.height):
+        line_data = [img.getpixel((x, y)) for x in range(img.width)]
+        line_data = "".join("0" if pix == 0 else "1" for pix in line_data)
+        line_data = int(line_data, 2).to_bytes(math.ceil(img.width / 8), "big")
+        header = struct.pack(">H3BB", y, 0, 0, 0, 1)
+        yield NiimbotPacket(0x85, header + line_data)
+
+
+def sample_label(width, height):
+    image = Image.new("1", (width, height), color=1)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((10, 10, width - 10, 60), outline=0, width=3)
+    for i, y in enumerate(range(80, height - 80, 32)):
+        draw.text((12, y), f"Line {i} - Jasmine Oolong, oat milk", fill=0)
+    draw.rectangle((width // 3, height - 60, 2 * width // 3, height - 10), fill=0)
+    return image
+
+
+def measure(encoder, image, repeat):
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _ in encoder(image):
+            rows += 1
+    return rows / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("-i", "--image", type=click.Path(exists=True), help="Image to encode (defaults to a synthetic label)")
+@click.option("--width", default=240, show_default=True, help="Synthetic label width in pixels")
+@click.option("--height", default=399, show_default=True, help="Synthetic label height in pixels")
+@click.option("-n", "--repeat", default=20, show_default=True, help="Encodes per implementation")
+def bench(image, width, height, repeat):
+    image = Image.open(image) if image else sample_label(width, height)
+
+    legacy = [(p.data[:2], p.data[5:]) for p in legacy_encode_image(image)]
+    current = [(p.data[:2], p.data[5:]) for p in encode_image(image, compress=False)]
+    assert legacy == current, "Encoders disagree on row data"
+
+    before = measure(legacy_encode_image, image, repeat)
+    after = measure(lambda img: encode_image(img, compress=False), image, repeat)
+    stats = EncodeStats()
+    for _ in encode_image(image, stats=stats):
+        pass
+    print(f"{image.width}x{image.height}, {repeat} runs")
+    print(f"before: {before:12,.0f} rows/s")
+    print(f"after:  {after:12,.0f} rows/s  ({after / before:.1f}x)")
+    print(f"compressed: {stats}")
+
+
+if __name__ == '__main__':
+    bench()
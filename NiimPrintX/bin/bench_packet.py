@@ -0,0 +1,50 @@
+import timeit
+
+import click
+from PIL import Image, ImageDraw
+
+from NiimPrintX.nimmy.packet import frame_packets
+from NiimPrintX.nimmy.raster import encode_image
+
+
+def legacy_to_bytes(packet):
+    # NiimbotPacket.to_bytes before the bulk framer
+    checksum = packet.type ^ len(packet.data)
+    for i in packet.data:
+        checksum ^= i
+    return bytes(
+        (0x55, 0x55, packet.type, len(packet.data), *packet.data, checksum, 0xAA, 0xAA)
+    )
+
+
+def sample_label(width, height):
+    image = Image.new("1", (width, height), color=1)
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 24):
+        draw.text((4, y), "Jasmine Oolong milk tea, oat, 50% sweet " * 2, fill=0)
+    return image
+
+
+@click.command()
+@click.option("--width", default=384, show_default=True, help="Label width in pixels")
+@click.option("--height", default=400, show_default=True, help="Label height in rows")
+@click.option("-n", "--repeat", default=200, show_default=True, help="Framings per implementation")
+def bench(width, height, repeat):
+    packets = list(encode_image(sample_label(width, height), compress=False))
+    expected = b"".join(legacy_to_bytes(p) for p in packets)
+    assert b"".join(p.to_bytes() for p in packets) == expected
+    assert bytes(frame_packets(packets).buffer) == expected
+
+    runs = {
+        "legacy to_bytes": lambda: [legacy_to_bytes(p) for p in packets],
+        "NiimbotPacket.to_bytes": lambda: [p.to_bytes() for p in packets],
+        "frame_packets": lambda: frame_packets(packets),
+    }
+    print(f"{len(packets)} packets, {len(expected)} bytes, {repeat} runs")
+    for name, run in runs.items():
+        seconds = timeit.timeit(run, number=repeat) / repeat
+        print(f"{name:24} {seconds * 1e3:8.3f} ms/label  {len(packets) / seconds:12,.0f} packets/s")
+
+
+if __name__ == '__main__':
+    bench()
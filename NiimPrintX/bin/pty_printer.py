@@ -0,0 +1,52 @@
+import os
+import time
+import tty
+from pathlib import Path
+
+import click
+
+from NiimPrintX.nimmy.packet import PacketDeframer
+from NiimPrintX.nimmy.simulator import SimulatedPrinter
+
+
+@click.command()
+@click.option("-m", "--model", default="b1", show_default=True, help="Model the simulated printer reports")
+@click.option("-o", "--output", type=click.Path(file_okay=False), help="Directory to save printed pages in")
+def serve(model, output):
+    """Serve a simulated printer on a pseudo-terminal, a stand-in for its USB serial port.
+
+    Print to it with ``print -t usb --port`` and the path shown.
+    """
+    printer = SimulatedPrinter(f"{model.upper()}-PTY")
+    deframer = PacketDeframer()
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    click.echo(f"Simulated {model.upper()} on {os.ttyname(slave)}, Ctrl+C to stop")
+    pages = 0
+    try:
+        while True:
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                # Nothing has the port open
+                time.sleep(0.1)
+                continue
+            for packet in deframer.feed(data):
+                reply = printer.handle(packet, time.monotonic())
+                if reply is not None:
+                    os.write(master, reply.to_bytes())
+            for page in printer.pages[pages:]:
+                pages += 1
+                click.echo(f"Page {pages}: {page.width}x{page.height}")
+                if output:
+                    Path(output).mkdir(parents=True, exist_ok=True)
+                    page.save(Path(output) / f"page_{pages}.png")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == '__main__':
+    serve()
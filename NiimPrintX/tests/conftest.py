@@ -0,0 +1,43 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from NiimPrintX.nimmy.cache import frame_cache
+from NiimPrintX.nimmy.printer import PrinterClient
+from NiimPrintX.nimmy.simulator import SimulatedPrinter, SimulatedTransport
+
+
+def sample_label(width=239, height=120):
+    image = Image.new("1", (width, height), color=1)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((2, 2, width - 3, 30), outline=0, width=3)
+    draw.text((8, 40), "Jasmine Oolong, oat milk", fill=0)
+    draw.rectangle((width // 3, 70, 2 * width // 3, 100), fill=0)
+    draw.point([(x, 110) for x in range(0, width, 17)], fill=0)
+    return image
+
+
+@pytest.fixture
+def label():
+    return sample_label()
+
+
+@pytest.fixture(autouse=True)
+def empty_frame_cache():
+    frame_cache.clear()
+    yield
+    frame_cache.clear()
+
+
+@pytest.fixture
+def connect_simulator():
+    """Coroutine function returning a PrinterClient connected to a simulated printer.
+
+    The printer defaults to a B1, ``transport`` to SimulatedTransport and
+    other keyword arguments go to the transport."""
+    async def connect(printer=None, transport=SimulatedTransport, **options):
+        transport = transport(printer or SimulatedPrinter(), **options)
+        client = PrinterClient(transport.device, transport)
+        await client.connect()
+        return client
+
+    return connect
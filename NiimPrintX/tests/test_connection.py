@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from NiimPrintX.nimmy.connection import ConnectionManager, ConnectionState
+from NiimPrintX.nimmy.exception import PrinterException, TransportException
+from NiimPrintX.nimmy.simulator import SimulatedTransport
+
+
+class FlakyTransport(SimulatedTransport):
+    """Fails the next ``failures`` connection attempts."""
+
+    def __init__(self, failures=0, **options):
+        super().__init__(**options)
+        self.failures = failures
+        self.attempts = 0
+
+    async def connect(self, address):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise TransportException("Printer out of range")
+        return await super().connect(address)
+
+
+def manager_for(transport, keepalive=60.0):
+    return ConnectionManager("b1", transport.device, transport, keepalive=keepalive, check_interval=0.01,
+                             first_delay=0.01, max_delay=0.02)
+
+
+def test_reconnects_after_flaky_attempts_and_a_dropped_link():
+    transport = FlakyTransport(failures=3)
+
+    async def run():
+        manager = manager_for(transport)
+        printer = await manager.connected(timeout=1.0)
+        assert transport.attempts == 4
+        await transport.disconnect()
+        transport.failures = 2
+        assert await manager.connected(timeout=1.0) is printer
+        assert printer.transport.is_connected
+        await printer.heartbeat()
+        disconnects = manager.disconnects
+        await manager.close()
+        return disconnects
+
+    assert asyncio.run(run()) == 1
+    assert transport.attempts == 7
+
+
+def test_wait_for_times_out_while_the_printer_is_away():
+    async def run():
+        manager = manager_for(FlakyTransport(failures=1000))
+        manager.start()
+        reached = await manager.wait_for(ConnectionState.CONNECTED, timeout=0.05)
+        state = manager.state
+        await manager.close()
+        return reached, state
+
+    assert asyncio.run(run()) == (False, ConnectionState.CONNECTING)
+
+
+def test_keepalive_heartbeat_after_idle():
+    transport = SimulatedTransport()
+
+    async def run():
+        manager = manager_for(transport, keepalive=0.05)
+        await manager.connected(timeout=1.0)
+        writes = transport.writes
+        await asyncio.sleep(0.2)
+        heartbeats = transport.writes - writes
+        await manager.close()
+        return heartbeats
+
+    assert asyncio.run(run()) >= 2
+
+
+def test_connected_raises_after_close():
+    async def run():
+        manager = manager_for(FlakyTransport(failures=1000))
+        waiting = asyncio.create_task(manager.connected())
+        await asyncio.sleep(0.02)
+        await manager.close()
+        with pytest.raises(TransportException, match="closed"):
+            await waiting
+        assert manager.state == ConnectionState.CLOSED
+        with pytest.raises(PrinterException, match="closed"):
+            await manager.connected()
+
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+import pytest
+from PIL import Image
+
+from NiimPrintX.nimmy import dither
+from NiimPrintX.nimmy.dither import DITHER_METHODS, dither_image
+
+
+def gradient(width, height):
+    return Image.linear_gradient("L").resize((width, height)).rotate(30, fillcolor=200)
+
+
+@pytest.mark.parametrize("method", DITHER_METHODS)
+def test_dither_returns_bilevel_image(method):
+    result = dither_image(gradient(96, 40), method)
+    assert result.mode == "1" and result.size == (96, 40)
+
+
+@pytest.mark.parametrize("size", [(1, 1), (1, 9), (9, 1), (7, 5), (239, 120)])
+@pytest.mark.parametrize("threshold", [1, 128, 255])
+def test_numpy_atkinson_matches_python_loop(monkeypatch, size, threshold):
+    pytest.importorskip("numpy")
+    gray = gradient(*size)
+    fast = dither._atkinson(gray, threshold)
+    monkeypatch.setattr(dither, "numpy", None)
+    assert fast.tobytes() == dither._atkinson(gray, threshold).tobytes()
+
+
+def test_palette_images_are_cached_by_colour():
+    black = Image.new("P", (16, 8))
+    black.putpalette([0, 0, 0] * 256)
+    white = Image.new("P", (16, 8))
+    white.putpalette([255, 255, 255] * 256)
+    assert dither_image(black, "threshold").getextrema() == (0, 0)
+    assert dither_image(white, "threshold").getextrema() == (255, 255)
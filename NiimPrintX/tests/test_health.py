@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from NiimPrintX.nimmy.exception import PrinterNotReadyException
+from NiimPrintX.nimmy.health import HealthMonitor
+from NiimPrintX.nimmy.packet import NiimbotPacket
+from NiimPrintX.nimmy.printer import RequestCodeEnum, ResponseCodeEnum
+from NiimPrintX.nimmy.simulator import SimulatedPrinter
+
+
+class NoRfidPrinter(SimulatedPrinter):
+    def handle(self, packet, now=0.0):
+        if packet.type == RequestCodeEnum.GET_RFID:
+            return NiimbotPacket(ResponseCodeEnum.NOT_SUPPORTED, b"\x00")
+        return super().handle(packet, now)
+
+
+@pytest.fixture
+def check(connect_simulator):
+    def check(printer, job=False):
+        async def run():
+            monitor = HealthMonitor(await connect_simulator(printer))
+            if job:
+                async with monitor.job() as health:
+                    return health
+            return await monitor.check()
+
+        return asyncio.run(run())
+
+    return check
+
+
+def test_ready_printer_reports_labels_left(check):
+    health = check(SimulatedPrinter())
+    assert health.problems() == ()
+    assert health.labels_left == 230
+
+
+def test_printer_without_rfid_is_ready(check):
+    health = check(NoRfidPrinter())
+    assert health.problems() == ()
+    assert health.heartbeat is not None and health.labels_left is None
+    assert check(NoRfidPrinter(), job=True).problems() == ()
+
+
+@pytest.mark.parametrize("state, problem", [
+    ({"closing_state": 1}, "lid open"),
+    ({"paper_state": 1}, "no labels loaded"),
+    ({"power_level": 0}, "battery empty"),
+])
+def test_job_refused_when_not_ready(check, state, problem):
+    printer = SimulatedPrinter()
+    for key, value in state.items():
+        setattr(printer, key, value)
+    with pytest.raises(PrinterNotReadyException, match=problem):
+        check(printer, job=True)
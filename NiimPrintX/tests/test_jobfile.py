@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from click.testing import CliRunner
+from PIL import ImageChops
+
+from NiimPrintX.cli.command import niimbot_cli
+from NiimPrintX.nimmy.exception import PrinterException, TransportException
+from NiimPrintX.nimmy.jobfile import encode_job, is_job_file, load_job
+from NiimPrintX.nimmy.simulator import SimulatedPrinter, SimulatedTransport
+
+
+class FailingTransport(SimulatedTransport):
+    """Loses the link after ``writes_left`` more writes."""
+
+    writes_left = None
+
+    async def write(self, data, char_uuid, response=None):
+        if self.writes_left is not None:
+            if self.writes_left == 0:
+                raise TransportException("Link lost")
+            self.writes_left -= 1
+        await super().write(data, char_uuid, response)
+
+
+@pytest.fixture
+def print_file(connect_simulator):
+    def print_file(path, name="B1-SIM", writes_left=None):
+        async def run():
+            printer = await connect_simulator(SimulatedPrinter(name), transport=FailingTransport)
+            printer.transport.writes_left = writes_left
+            await printer.print_job_file(path)
+            return printer.transport
+
+        return asyncio.run(run())
+
+    return print_file
+
+
+@pytest.fixture
+def job_path(tmp_path, label):
+    path = tmp_path / "label.nimj"
+    encode_job(label, "b1", v2=True, printhead_width=384).save(path)
+    return path
+
+
+def test_job_file_round_trip(print_file, job_path, label):
+    assert is_job_file(job_path)
+    with load_job(job_path) as job:
+        assert (job.model, job.width, job.height, job.v2) == ("b1", label.width, label.height, True)
+    page = print_file(job_path).printer.pages[0]
+    assert ImageChops.difference(page.convert("L"), label.convert("L")).getbbox() is None
+
+
+def test_failed_print_raises_the_transport_error(print_file, job_path):
+    with pytest.raises(TransportException, match="Link lost"):
+        print_file(job_path, writes_left=6)
+
+
+def test_job_for_another_model_is_refused(print_file, job_path):
+    with pytest.raises(PrinterException, match="encoded for B1"):
+        print_file(job_path, name="D110-SIM")
+
+
+def test_print_refuses_encode_options_with_a_job_file(job_path):
+    result = CliRunner().invoke(niimbot_cli, ["print", "-m", "b1", "-t", "sim", "-i", str(job_path), "-n", "2"])
+    assert result.exit_code == 2
+    assert "--quantity cannot be used with a job file" in result.output
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from NiimPrintX.nimmy.exception import PrinterTimeoutException
+from NiimPrintX.nimmy.printer import RequestCodeEnum, response_codes
+from NiimPrintX.nimmy.simulator import SimulatedPrinter, SimulatedTransport
+
+
+class CountingPrinter(SimulatedPrinter):
+    def __init__(self, name="B1-SIM"):
+        super().__init__(name)
+        self.received = {}
+
+    def handle(self, packet, now=0.0):
+        self.received[packet.type] = self.received.get(packet.type, 0) + 1
+        return super().handle(packet, now)
+
+
+class SlowReplyTransport(SimulatedTransport):
+    """Delays the next reply to ``slow_request`` by ``slow_delay`` seconds once armed."""
+
+    slow_request = None
+    slow_delay = 0.35
+
+    async def start_notification(self, char_uuid, handler):
+        def delayed(sender, data):
+            # Frames start 0x55 0x55 <type>
+            if self.slow_request is not None and data[2] in response_codes(self.slow_request, b"\x01"):
+                self.slow_request = None
+                asyncio.get_running_loop().call_later(self.slow_delay, handler, sender, data)
+            else:
+                handler(sender, data)
+
+        await super().start_notification(char_uuid, delayed)
+
+
+def test_slow_print_command_is_not_sent_twice(connect_simulator, label):
+    printer = CountingPrinter()
+
+    async def run():
+        client = await connect_simulator(printer, transport=SlowReplyTransport)
+        # Enough fast round trips to bring START_PAGE_PRINT's deadline down to its floor
+        for _ in range(client.latency.minimum_samples):
+            await client.print_labels([(label, 1)])
+        client.transport.slow_request = RequestCodeEnum.START_PAGE_PRINT
+        await client.print_labels([(label, 1)])
+
+    with pytest.raises(PrinterTimeoutException, match="START_PAGE_PRINT"):
+        asyncio.run(run())
+    assert printer.received[RequestCodeEnum.START_PAGE_PRINT] == 6
+
+
+def test_slow_heartbeat_is_retried(connect_simulator):
+    printer = CountingPrinter()
+
+    async def run():
+        client = await connect_simulator(printer, transport=SlowReplyTransport)
+        for _ in range(client.latency.minimum_samples):
+            await client.heartbeat()
+        client.transport.slow_request = RequestCodeEnum.HEARTBEAT
+        return await client.heartbeat()
+
+    assert asyncio.run(run()) is not None
+    assert printer.received[RequestCodeEnum.HEARTBEAT] == 7
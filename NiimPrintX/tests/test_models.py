@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from NiimPrintX.nimmy.models import PRINTER_MODELS, PrinterModel
+from NiimPrintX.nimmy.raster import BITMAP_ROW, EMPTY_ROW, INDEXED_ROW
+from NiimPrintX.nimmy.simulator import SimulatedTransport
+
+
+class RecordingTransport(SimulatedTransport):
+    def __init__(self, printer=None, **options):
+        super().__init__(printer, **options)
+        self.sizes = []
+
+    async def write(self, data, char_uuid, response=None):
+        self.sizes.append(len(data))
+        await super().write(data, char_uuid, response)
+
+
+@pytest.fixture
+def print_as(connect_simulator, monkeypatch, label):
+    def print_as(model):
+        monkeypatch.setitem(PRINTER_MODELS, "b1", model)
+
+        async def run():
+            printer = await connect_simulator(transport=RecordingTransport)
+            await printer.print_labels([(label, 1)])
+            return printer
+
+        return asyncio.run(run())
+
+    return print_as
+
+
+def test_row_packets_select_the_encoder(print_as):
+    printer = print_as(PrinterModel("b1", 384, v2=True, row_packets=frozenset((BITMAP_ROW,))))
+    assert not printer.compress_rows
+    assert printer.transport.printer.errors == []
+    assert print_as(PrinterModel("b1", 384, v2=True, row_packets=frozenset(
+        (BITMAP_ROW, EMPTY_ROW, INDEXED_ROW)))).compress_rows
+
+
+def test_max_mtu_bounds_coalesced_writes(print_as):
+    largest = max(print_as(PrinterModel("b1", 384, v2=True)).transport.sizes)
+    printer = print_as(PrinterModel("b1", 384, v2=True, max_mtu=64))
+    assert printer.transport.printer.errors == []
+    assert max(printer.transport.sizes) <= 61 < largest
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from NiimPrintX.nimmy import pacing
+from NiimPrintX.nimmy.exception import PrinterException
+from NiimPrintX.nimmy.printer import RequestCodeEnum
+from NiimPrintX.nimmy.simulator import SimulatedPrinter
+
+
+class JammedPrinter(SimulatedPrinter):
+    """Fails every page and counts the jobs ended."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.ended = 0
+
+    def handle(self, packet, now=0.0):
+        if packet.type == RequestCodeEnum.END_PRINT:
+            self.ended += 1
+        if packet.type == RequestCodeEnum.END_PAGE_PRINT:
+            self._page = None
+            return super().handle(type(packet)(0xFF, b"\x00"), now)
+        return super().handle(packet, now)
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    profiles = pacing.PacingProfiles(tmp_path / "pacing.json")
+    monkeypatch.setattr(pacing, "pacing_profiles", profiles)
+    return profiles
+
+
+@pytest.fixture
+def calibrate_with(connect_simulator):
+    def calibrate_with(printer):
+        """Calibrate on ``printer``; returns the profile or the exception raised,
+        and whether the client's pacing changed."""
+        async def run():
+            client = await connect_simulator(printer)
+            client.page_timeout = 0.2
+            before = {key: getattr(client, key) for key in pacing.PACING_KEYS}
+            try:
+                result = await pacing.calibrate(client, windows=(1, 16), delays=(0.0, 0.001))
+            except PrinterException as e:
+                result = e
+            return result, before != {key: getattr(client, key) for key in pacing.PACING_KEYS}
+
+        return asyncio.run(run())
+
+    return calibrate_with
+
+
+def test_calibrate_saves_a_profile(calibrate_with, profiles):
+    profile, _ = calibrate_with(SimulatedPrinter("B1-SIM"))
+    assert profile["stream_window"] == 16
+    assert list(profiles._load()["b1"].values()) == [profile]
+
+
+def test_failed_calibration_ends_probes_and_restores_pacing(calibrate_with, profiles):
+    printer = JammedPrinter("B1-SIM")
+    error, changed = calibrate_with(printer)
+    assert isinstance(error, PrinterException) and "No pacing" in str(error)
+    assert not changed
+    # One probe each for the window size, the window delay and the row delay
+    assert printer.ended == 3
+    assert not profiles.has_model("b1")
+
+
+def test_forget_survives_unwritable_file(tmp_path, monkeypatch):
+    profiles = pacing.PacingProfiles(tmp_path / "pacing.json")
+    profiles.save("b1", 512, {"stream_window": 8})
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(type(profiles.path), "write_text", read_only)
+    profiles.forget("b1")
+    assert profiles.has_model("b1")
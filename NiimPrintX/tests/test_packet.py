@@ -0,0 +1,89 @@
+import pytest
+
+from NiimPrintX.nimmy.packet import NiimbotPacket, PacketDeframer, frame_packets, xor_checksum
+from NiimPrintX.nimmy.raster import encode_image
+
+
+def legacy_to_bytes(packet):
+    # NiimbotPacket.to_bytes before the bulk framer
+    checksum = packet.type ^ len(packet.data)
+    for i in packet.data:
+        checksum ^= i
+    return bytes((0x55, 0x55, packet.type, len(packet.data), *packet.data, checksum, 0xAA, 0xAA))
+
+
+def test_to_bytes_matches_legacy_framing(label):
+    for packet in encode_image(label):
+        assert packet.to_bytes() == legacy_to_bytes(packet)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_frame_packets_matches_to_bytes(label, compress):
+    packets = list(encode_image(label, compress=compress))
+    frames = frame_packets(packets)
+    assert len(frames) == len(packets)
+    assert [bytes(f) for f in frames] == [p.to_bytes() for p in packets]
+    assert bytes(frames.buffer) == b"".join(p.to_bytes() for p in packets)
+
+
+def test_frame_packets_of_nothing():
+    frames = frame_packets([])
+    assert len(frames) == 0 and list(frames) == []
+
+
+def test_xor_checksum():
+    for data in (b"", b"\x01", b"\x12\x34\x56", bytes(range(200))):
+        expected = 0x5A
+        for b in data:
+            expected ^= b
+        assert xor_checksum(data, 0x5A) == expected
+
+
+def test_from_bytes_round_trip():
+    packet = NiimbotPacket.from_bytes(NiimbotPacket(0xDD, b"\x00\x01\x02").to_bytes())
+    assert (packet.type, bytes(packet.data)) == (0xDD, b"\x00\x01\x02")
+
+
+def stream():
+    packets = [NiimbotPacket(0x41, b"\x55\x55"), NiimbotPacket(0xDD, bytes(13)), NiimbotPacket(0x02, b"")]
+    return packets, b"".join(p.to_bytes() for p in packets)
+
+
+def summary(packets):
+    return [(p.type, bytes(p.data)) for p in packets]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_deframer_reassembles_split_notifications(size):
+    packets, data = stream()
+    deframer = PacketDeframer()
+    out = []
+    for i in range(0, len(data), size):
+        out += deframer.feed(data[i:i + size])
+    assert summary(out) == summary(packets)
+    assert deframer.pending == 0 and deframer.dropped == 0
+
+
+def test_deframer_skips_noise_between_frames():
+    packets, _ = stream()
+    data = b"\x00\xaa" + packets[0].to_bytes() + b"\x55\x13" + packets[1].to_bytes() + b"\x55" + packets[2].to_bytes()
+    deframer = PacketDeframer()
+    assert summary(deframer.feed(data)) == summary(packets)
+    assert deframer.dropped == 5
+
+
+def test_deframer_drops_bad_checksum():
+    good = NiimbotPacket(0x02, b"\x01").to_bytes()
+    bad = bytearray(good)
+    bad[-3] ^= 0xFF
+    deframer = PacketDeframer()
+    assert summary(deframer.feed(bytes(bad) + good)) == [(0x02, b"\x01")]
+    assert deframer.dropped == len(bad)
+
+
+def test_deframer_keeps_partial_frame():
+    data = NiimbotPacket(0x02, b"\x01\x02").to_bytes()
+    deframer = PacketDeframer()
+    assert deframer.feed(data[:-1]) == []
+    assert deframer.pending == len(data) - 1
+    assert summary(deframer.feed(data[-1:])) == [(0x02, b"\x01\x02")]
@@ -0,0 +1,81 @@
+import math
+import struct
+
+import pytest
+from PIL import Image, ImageOps
+
+from NiimPrintX.nimmy.packet import NiimbotPacket
+from NiimPrintX.nimmy.raster import BITMAP_ROW, EMPTY_ROW, encode_image, encode_rows, pack_image, pixel_counts
+
+
+def legacy_encode_image(image, vertical_offset=0, horizontal_offset=0):
+    # Per-pixel encoder that shipped before NiimPrintX.nimmy.raster, except
+    # that offset padding is blank where it used to be filled with black dots
+    img = ImageOps.invert(image.convert("L")).convert("1")
+    if horizontal_offset > 0:
+        img = ImageOps.expand(img, border=(horizontal_offset, 0, 0, 0), fill=0)
+    else:
+        img = img.crop((-horizontal_offset, 0, img.width, img.height))
+    if vertical_offset > 0:
+        img = ImageOps.expand(img, border=(0, vertical_offset, 0, 0), fill=0)
+    else:
+        img = img.crop((0, -vertical_offset, img.width, img.height))
+
+    for y in range(img.height):
+        line_data = [img.getpixel((x, y)) for x in range(img.width)]
+        line_data = "".join("0" if pix == 0 else "1" for pix in line_data)
+        line_data = int(line_data, 2).to_bytes(math.ceil(img.width / 8), "big")
+        header = struct.pack(">H3BB", y, 0, 0, 0, 1)
+        yield NiimbotPacket(0x85, header + line_data)
+
+
+def rows(packets):
+    return [(p.data[:2], p.data[5:]) for p in packets]
+
+
+def decode(packets, stride, height):
+    """Rebuild the packed rows a printer would print from row packets."""
+    out = bytearray(stride * height)
+    for p in packets:
+        y, = struct.unpack_from(">H", p.data)
+        if p.type == EMPTY_ROW:
+            continue
+        repeat = p.data[5]
+        if p.type == BITMAP_ROW:
+            row = bytes(p.data[6:])
+        else:
+            bits = 0
+            for index in struct.unpack(f">{(len(p.data) - 6) // 2}H", p.data[6:]):
+                bits |= 1 << (stride * 8 - 1 - index)
+            row = bits.to_bytes(stride, "big")
+        out[y * stride:(y + repeat) * stride] = row * repeat
+    return bytes(out)
+
+
+@pytest.mark.parametrize("offsets", [(0, 0), (5, 0), (0, 3), (0, -5), (-4, 9), (7, -11)])
+def test_uncompressed_rows_match_legacy_encoder(label, offsets):
+    assert rows(encode_image(label, *offsets, compress=False)) == rows(legacy_encode_image(label, *offsets))
+
+
+@pytest.mark.parametrize("width", [8, 239, 240, 384])
+def test_pack_image_matches_legacy_rows(width):
+    image = Image.effect_noise((width, 16), 80).convert("1")
+    data, out_width, height, stride = pack_image(image)
+    assert (out_width, height, stride) == (width, 16, (width + 7) // 8)
+    assert [data[y * stride:(y + 1) * stride] for y in range(height)] == \
+        [p.data[6:] for p in legacy_encode_image(image)]
+
+
+def test_compressed_rows_print_the_same_image(label):
+    data, width, height, stride = pack_image(label)
+    packets = list(encode_rows(data, height, stride, compress=True))
+    assert len(packets) < height
+    assert decode(packets, stride, height) == data
+
+
+def test_pixel_counts_follow_the_printhead():
+    # 239 px rows are 30 bytes, the B1's 384 dot printhead is in thirds of 16 bytes
+    row = bytes([0x7F]) + bytes([0xFF]) * 29
+    assert pixel_counts(row, 384) == (127, 112, 0)
+    assert pixel_counts(row) == (0, 0, 0)
+    assert pixel_counts(bytes([0xFF]) * 48, 384) == (128, 128, 128)
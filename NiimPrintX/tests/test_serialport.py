@@ -0,0 +1,66 @@
+import asyncio
+import os
+import select
+import threading
+import time
+
+import pytest
+from PIL import ImageChops
+
+pytest.importorskip("serial")
+tty = pytest.importorskip("tty")
+
+from NiimPrintX.nimmy.packet import PacketDeframer  # noqa: E402
+from NiimPrintX.nimmy.printer import PrinterClient  # noqa: E402
+from NiimPrintX.nimmy.serialport import SerialDevice, SerialTransport  # noqa: E402
+from NiimPrintX.nimmy.simulator import SimulatedPrinter  # noqa: E402
+
+
+@pytest.fixture
+def pty_printer():
+    """A simulated B1 answering on a pseudo-terminal, as on its USB serial port."""
+    printer = SimulatedPrinter("B1-USB")
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    stop = threading.Event()
+
+    def serve():
+        deframer = PacketDeframer()
+        while not stop.is_set():
+            if not select.select([master], [], [], 0.05)[0]:
+                continue
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                # Nothing has the port open
+                time.sleep(0.01)
+                continue
+            for packet in deframer.feed(data):
+                reply = printer.handle(packet, time.monotonic())
+                if reply is not None:
+                    os.write(master, reply.to_bytes())
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield printer, os.ttyname(slave)
+    stop.set()
+    thread.join()
+    os.close(master)
+    os.close(slave)
+
+
+def test_print_over_serial_port(pty_printer, label):
+    printer, port = pty_printer
+
+    async def run():
+        client = PrinterClient(SerialDevice("B1-USB", port), SerialTransport())
+        await client.connect()
+        try:
+            return await client.print_labels([(label, 2)])
+        finally:
+            await client.disconnect()
+
+    assert asyncio.run(run())
+    assert printer.errors == []
+    assert len(printer.pages) == 1
+    assert ImageChops.difference(printer.pages[0].convert("L"), label.convert("L")).getbbox() is None
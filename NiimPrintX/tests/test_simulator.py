@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from PIL import ImageChops
+
+from NiimPrintX.nimmy.exception import TransportException
+from NiimPrintX.nimmy.simulator import SimulatedPrinter, SimulatedTransport
+
+
+def same_image(a, b):
+    return a.size == b.size and ImageChops.difference(a.convert("L"), b.convert("L")).getbbox() is None
+
+
+@pytest.fixture
+def print_with(connect_simulator):
+    def print_with(model, pages, **transport_options):
+        async def run():
+            printer = await connect_simulator(SimulatedPrinter(f"{model.upper()}-SIM"), **transport_options)
+            done = await printer.print_labels(pages)
+            await printer.disconnect()
+            return printer.transport, done
+
+        return asyncio.run(run())
+
+    return print_with
+
+
+@pytest.mark.parametrize("model", ["b1", "d110"])
+def test_printed_page_matches_image(print_with, model, label):
+    transport, done = print_with(model, [(label, 1)])
+    assert done
+    assert transport.printer.errors == []
+    assert len(transport.printer.pages) == 1
+    assert same_image(transport.printer.pages[0], label)
+
+
+def test_several_pages_in_one_job(print_with, label):
+    other = label.transpose(0)
+    transport, done = print_with("b1", [(label, 2), (other, 1)])
+    assert done
+    pages = transport.printer.pages
+    assert len(pages) == 2 and same_image(pages[0], label) and same_image(pages[1], other)
+
+
+@pytest.mark.parametrize("options", [{"mtu": 23}, {"mtu": 64}, {"notify_size": 5}, {"latency": 0.001}])
+def test_round_trip_over_constrained_links(print_with, label, options):
+    transport, done = print_with("b1", [(label, 1)], **options)
+    assert done
+    assert transport.printer.errors == []
+    assert same_image(transport.printer.pages[0], label)
+
+
+def test_simulated_printer_answers_heartbeat(connect_simulator):
+    async def run():
+        printer = await connect_simulator()
+        return await printer.heartbeat()
+
+    heartbeat = asyncio.run(run())
+    assert (heartbeat.closing_state, heartbeat.paper_state) == (0, 0)
+
+
+def test_dropped_link_fails_acknowledged_row_writes(connect_simulator, label):
+    class Dropping(SimulatedTransport):
+        async def write(self, data, char_uuid, response=None):
+            if response and self.printer._page is not None:
+                self._connected = False
+                raise TransportException("Link lost")
+            await super().write(data, char_uuid, response)
+
+    async def run():
+        printer = await connect_simulator(transport=Dropping)
+        printer.stream_window = 0
+        await printer.print_labels([(label, 1)])
+
+    with pytest.raises(TransportException, match="Link lost"):
+        asyncio.run(run())
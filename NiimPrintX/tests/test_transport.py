@@ -0,0 +1,28 @@
+import pytest
+
+from NiimPrintX.nimmy.simulator import SimulatedTransport
+from NiimPrintX.nimmy.transport import Transport, make_transport
+
+
+def test_incomplete_transport_cannot_be_created():
+    class WriteOnly(Transport):
+        async def write(self, data, char_uuid, response=None):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        WriteOnly()
+
+
+def test_make_transport():
+    device, transport = make_transport("sim", "d110")
+    assert isinstance(transport, SimulatedTransport) and device.name == "D110-SIM"
+    assert make_transport("ble", "d110") == (None, None)
+    with pytest.raises(ValueError, match="Unknown transport"):
+        make_transport("wifi", "d110")
+
+
+def test_make_serial_transport():
+    pytest.importorskip("serial")
+    device, transport = make_transport("usb", "b1", "/dev/ttyACM1")
+    assert (device.name, device.address) == ("B1-USB", "/dev/ttyACM1")
+    assert transport.pacing is not None
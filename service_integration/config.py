@@ -12,6 +12,8 @@ SQUARE_LOCATION_ID: str = os.environ["SQUARE_LOCATION_ID"]
 # --- Optional (with defaults) ---
 PRINTER_MODEL: str = os.getenv("PRINTER_MODEL", "b1")
 PRINTER_DENSITY: int = int(os.getenv("PRINTER_DENSITY", "3"))
+PRINTER_TRANSPORT: str = os.getenv("PRINTER_TRANSPORT", "ble")  # "ble", "usb" or "sim"
+PRINTER_PORT: str = os.getenv("PRINTER_PORT", "/dev/ttyACM0")  # serial port for "usb"
 POLL_INTERVAL: int = int(os.getenv("POLL_INTERVAL", "15"))
 LABEL_WIDTH_MM: int = int(os.getenv("LABEL_WIDTH_MM", "50"))   # long edge
 LABEL_HEIGHT_MM: int = int(os.getenv("LABEL_HEIGHT_MM", "30"))  # short edge
@@ -72,6 +72,7 @@ def generate_label(
     order_number: str,
     output_dir: str = ".",
     note: str = "",
+    suffix: str = "",
 ) -> Path:
     """Render a single drink label and return the path to the saved PNG.
 
@@ -80,6 +81,9 @@ def generate_label(
         2. Separator  — thin horizontal rule
         3. Modifiers  — 22 px regular, up to 4 bullet lines
         4. Order #    — 42 px bold, centred at bottom
+
+    *suffix* is appended to the file name so several labels of one order
+    can exist side by side before they are printed.
     """
     img = Image.new("1", (WIDTH, HEIGHT), color=1)  # 1-bit white
     draw = ImageDraw.Draw(img)
@@ -139,7 +143,7 @@ def generate_label(
     draw.text((x, y_order), order_text, font=order_font, fill=0)
 
     # ── Save ───────────────────────────────────────────────────────────────
-    output_path = Path(output_dir) / f"temp_label_{order_number}.png"
+    output_path = Path(output_dir) / f"temp_label_{order_number}{suffix}.png"
     img.save(output_path)
     logger.info("Label saved → %s", output_path)
     return output_path
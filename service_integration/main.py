@@ -28,13 +28,47 @@ logger = logging.getLogger(__name__)
 LABEL_OUTPUT_DIR = Path("labels")
 
 
+def _render_order(order: dict) -> list[tuple[Path, int]]:
+    """Generate one label per line item and return ``(path, copies)`` pairs."""
+    labels: list[tuple[Path, int]] = []
+    order_note = order.get("note", "")
+
+    for index, item in enumerate(order["line_items"]):
+        if item["quantity"] < 1:
+            continue
+
+        # Combine order-level and item-level notes
+        item_note = item.get("note", "")
+        note_parts = [n for n in (order_note, item_note) if n]
+        note = " | ".join(note_parts)
+
+        label_path = generate_label(
+            item_name=item["name"],
+            modifiers=item["modifiers"],
+            order_number=order["order_number"],
+            output_dir=str(LABEL_OUTPUT_DIR),
+            note=note,
+            suffix=f"_{index}",
+        )
+        labels.append((label_path, item["quantity"]))
+
+    return labels
+
+
 async def process_orders(
     store: PrintedOrderStore,
     printer: PrinterService,
 ) -> None:
-    """Fetch new orders from Square, generate & print a label per drink."""
+    """Fetch new orders from Square and print every new drink as one job.
+
+    All labels from one poll go out as consecutive pages of a single print
+    session; the orders are only marked printed once the whole job succeeds.
+    """
     orders = fetch_completed_orders()
 
+    order_ids: list[str] = []
+    labels: list[tuple[Path, int]] = []
+
     for order in orders:
         order_id = order["order_id"]
 
@@ -48,42 +82,22 @@ async def process_orders(
             len(order["line_items"]),
         )
 
-        all_ok = True
-
-        order_note = order.get("note", "")
-
-        for item in order["line_items"]:
-            # Combine order-level and item-level notes
-            item_note = item.get("note", "")
-            note_parts = [n for n in (order_note, item_note) if n]
-            note = " | ".join(note_parts)
-
-            for copy in range(item["quantity"]):
-                label_path = generate_label(
-                    item_name=item["name"],
-                    modifiers=item["modifiers"],
-                    order_number=order["order_number"],
-                    output_dir=str(LABEL_OUTPUT_DIR),
-                    note=note,
-                )
-
-                success = await printer.print_label(label_path)
-
-                if success:
-                    label_path.unlink(missing_ok=True)
-                else:
-                    all_ok = False
-                    break
-
-            if not all_ok:
-                break
-
-        if all_ok:
-            store.mark_printed(order_id)
-        else:
-            logger.warning(
-                "Order %s incomplete — will retry next cycle", order_id
-            )
+        order_ids.append(order_id)
+        labels.extend(_render_order(order))
+
+    if not order_ids:
+        return
+
+    if labels and not await printer.print_labels(labels):
+        logger.warning(
+            "Orders %s incomplete — will retry next cycle", ", ".join(order_ids)
+        )
+        return
+
+    for label_path, _ in labels:
+        label_path.unlink(missing_ok=True)
+    for order_id in order_ids:
+        store.mark_printed(order_id)
 
 
 async def run() -> None:
@@ -152,35 +166,26 @@ async def reprint_order(order_identifier: str) -> None:
         len(order["line_items"]),
     )
 
+    labels = _render_order(order)
+    if not labels:
+        logger.warning("Order %s has no labels to reprint", order["order_number"])
+        return
+
     printer = PrinterService()
 
     try:
-        order_note = order.get("note", "")
-
-        for item in order["line_items"]:
-            item_note = item.get("note", "")
-            note_parts = [n for n in (order_note, item_note) if n]
-            note = " | ".join(note_parts)
-
-            for copy in range(item["quantity"]):
-                label_path = generate_label(
-                    item_name=item["name"],
-                    modifiers=item["modifiers"],
-                    order_number=order["order_number"],
-                    output_dir=str(LABEL_OUTPUT_DIR),
-                    note=note,
-                )
-
-                success = await printer.print_label(label_path)
-
-                if success:
-                    label_path.unlink(missing_ok=True)
-                else:
-                    logger.error("Reprint failed for %s", label_path.name)
-                    return
+        if not await printer.print_labels(labels):
+            logger.error(
+                "Reprint failed for %s",
+                ", ".join(path.name for path, _ in labels),
+            )
+            return
     finally:
         await printer.disconnect()
 
+    for label_path, _ in labels:
+        label_path.unlink(missing_ok=True)
+
     logger.info("Reprint complete for order %s", order["order_number"])
 
 
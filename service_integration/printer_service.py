@@ -1,6 +1,5 @@
 """Thin wrapper around NiimPrintX for printing label images on the NIIMBOT B1."""
 
-import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -13,64 +12,101 @@ _niim_root = str(Path(__file__).resolve().parent.parent / "NiimPrintX")
 if _niim_root not in sys.path:
     sys.path.insert(0, _niim_root)
 
-from NiimPrintX.nimmy.bluetooth import find_device  # noqa: E402
-from NiimPrintX.nimmy.printer import PrinterClient  # noqa: E402
+from NiimPrintX.nimmy.connection import ConnectionManager  # noqa: E402
+from NiimPrintX.nimmy.exception import PrinterNotReadyException  # noqa: E402
+from NiimPrintX.nimmy.health import HealthMonitor  # noqa: E402
+from NiimPrintX.nimmy.transport import make_transport  # noqa: E402
 
 # Suppress verbose loguru DEBUG output from NiimPrintX
 from loguru import logger as _loguru_logger  # noqa: E402
 _loguru_logger.remove()
 _loguru_logger.add(sys.stderr, level="INFO")
 
-from .config import PRINTER_DENSITY, PRINTER_MODEL
+from .config import LABEL_HEIGHT_PX, PRINTER_DENSITY, PRINTER_MODEL, PRINTER_PORT, PRINTER_TRANSPORT
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for the printer before giving up on a job
+CONNECT_TIMEOUT = 15.0
+
 
 class PrinterService:
-    """Manages the BLE connection to the NIIMBOT B1 and prints label images."""
+    """Keeps the NIIMBOT B1 connected over BLE or USB and prints label images."""
 
     def __init__(self) -> None:
-        self._printer: PrinterClient | None = None
-        self._connected: bool = False
+        self._manager: ConnectionManager | None = None
+        self._monitor: HealthMonitor | None = None
 
     async def connect(self) -> None:
-        """Scan for the printer via BLE and establish a connection."""
-        device = await find_device(PRINTER_MODEL)
-        self._printer = PrinterClient(device)
-        if await self._printer.connect():
-            self._connected = True
-            logger.info("Printer connected: %s", device.name)
-        else:
-            raise ConnectionError("Failed to connect to printer")
+        """Start keeping the printer connected and wait for the first connection.
+
+        The printer is found through the device cache or a BLE scan, kept
+        awake with keepalive heartbeats and reconnected by address whenever
+        the link drops. ``PRINTER_TRANSPORT=usb`` talks to a printer on the
+        USB serial port ``PRINTER_PORT`` instead, and ``PRINTER_TRANSPORT=sim``
+        to an in-process simulated printer, so the service runs without a
+        Bluetooth adapter.
+        """
+        if self._manager is None:
+            device, transport = make_transport(PRINTER_TRANSPORT, PRINTER_MODEL, PRINTER_PORT)
+            self._manager = ConnectionManager(PRINTER_MODEL, device, transport)
+        printer = await self._manager.connected(CONNECT_TIMEOUT)
+        if self._monitor is None:
+            logger.info("Printer connected: %s", printer.device.name)
+            capabilities = printer.capabilities
+            if LABEL_HEIGHT_PX > capabilities.printhead_width:
+                logger.warning(
+                    "Labels are %d px across but the %s printhead is %d dots wide",
+                    LABEL_HEIGHT_PX, capabilities.name.upper(), capabilities.printhead_width,
+                )
+            self._monitor = HealthMonitor(printer)
+            self._monitor.start()
 
     async def disconnect(self) -> None:
-        """Gracefully disconnect from the printer."""
-        if self._printer and self._connected:
-            await self._printer.disconnect()
-            self._connected = False
+        """Stop monitoring and gracefully disconnect from the printer."""
+        if self._monitor is not None:
+            await self._monitor.stop()
+            self._monitor = None
+        if self._manager is not None:
+            await self._manager.close()
+            self._manager = None
             logger.info("Printer disconnected")
 
-    async def _ensure_connected(self) -> None:
-        if not self._connected or self._printer is None:
-            await self.connect()
-
     async def print_label(self, image_path: Path) -> bool:
         """Send a label image to the printer.
 
         Returns True on success, False on failure.
         """
+        return await self.print_labels([(image_path, 1)])
+
+    async def print_labels(self, labels: list[tuple[Path, int]]) -> bool:
+        """Send several label images to the printer as one multi-page job.
+
+        *labels* is a list of ``(image_path, copies)`` pairs; each becomes a
+        page of the job printed *copies* times.  Returns True on success,
+        False on failure.
+
+        A printer that is reachable but not ready, with its lid open or out
+        of labels, fails the job before anything is sent and keeps its
+        connection, so the caller can simply retry later.
+        """
+        names = ", ".join(path.name for path, _ in labels)
         try:
-            await self._ensure_connected()
-            image = Image.open(image_path)
-            image = image.rotate(-90, expand=True)
-            await self._printer.print_imageV2(
-                image,
-                density=PRINTER_DENSITY,
-                quantity=1,
-            )
-            logger.info("Printed label: %s", image_path.name)
+            await self.connect()
+            pages = []
+            for image_path, copies in labels:
+                image = Image.open(image_path)
+                pages.append((image.rotate(-90, expand=True), copies))
+            async with self._manager.session() as printer, self._monitor.job():
+                await printer.print_labels(pages, density=PRINTER_DENSITY)
+            logger.info("Printed %d label(s): %s", sum(c for _, c in labels), names)
             return True
+        except PrinterNotReadyException as e:
+            logger.warning("Holding %s, printer not ready: %s", names, e)
+            return False
         except Exception:
-            logger.exception("Failed to print %s", image_path.name)
-            self._connected = False
+            logger.exception("Failed to print %s", names)
+            # Start the next job on a fresh link; the manager reconnects by address
+            if self._manager is not None and self._manager.printer is not None:
+                await self._manager.printer.disconnect()
             return False